@@ -0,0 +1,169 @@
+"""Benchmarks for the scoring engine, reference loading and export.
+
+    python benchmarks/run.py                          # 1k, 100k and 1M rows
+    python benchmarks/run.py --sizes 1000 100000 --save baseline.json
+    python benchmarks/run.py --compare baseline.json  # exit 1 on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from matcal.engine import calculate_metrics, calculate_metrics_batch
+from matcal.io import EXPORT_FORMATS, available_formats, export_bytes
+from matcal.memo import ResultCache
+from matcal.reference import WORKBOOK, Reference, get_reference, load_reference_tables
+from matcal.validate import validate_inputs
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+XLSX_MAX_ROWS = 100_000
+# rows corrected between uploads in the result-cache benchmark
+CACHE_EDITS = 20
+
+
+# --- Synthetic Data ---
+def synthetic_athletes(n, ref, seed=0):
+    # ages spread over every half-year bin that has coefficients and errors
+    rng = np.random.default_rng(seed)
+    bins = ref['age0'] + np.flatnonzero(ref['valid']) / 2
+    age = rng.choice(bins, n) + rng.uniform(-0.24, 0.24, n)
+    meas = pd.Timestamp('2025-06-01') - pd.to_timedelta(rng.integers(0, 3650, n), 'D')
+    dob = meas - pd.to_timedelta(np.floor(age * 365.25), 'D')
+    return pd.DataFrame({
+        'athlete_name': [f'Athlete {i}' for i in range(n)],
+        'dob': dob,
+        'measurement_date': meas,
+        'sex': rng.choice(['Male', 'Female'], n),
+        'standing_height_cm': rng.normal(150, 15, n).round(1),
+        'body_mass_kg': rng.normal(45, 10, n).clip(15).round(1),
+        'mother_height_cm': rng.normal(162, 6, n).round(1),
+        'father_height_cm': rng.normal(176, 7, n).round(1),
+    })
+
+
+# --- Timing ---
+def measure(fn, repeat=1, memory=True):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    result = {'seconds': min(times), 'median_seconds': statistics.median(times)}
+    if memory:
+        # separate untimed pass: tracemalloc slows allocation-heavy code considerably
+        tracemalloc.start()
+        fn()
+        result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result
+
+
+def run(sizes, repeat, memory, formats):
+    ref = get_reference()
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results['reference/cold'] = measure(lambda: Reference(load_reference_tables(WORKBOOK, tempfile.mkdtemp(dir=tmp))),
+                                            repeat, memory)
+        load_reference_tables(WORKBOOK, tmp)
+        results['reference/warm'] = measure(lambda: Reference(load_reference_tables(WORKBOOK, tmp)), repeat, memory)
+
+    row = synthetic_athletes(1, ref).iloc[0]
+    n_calls = 200
+    single = measure(lambda: [calculate_metrics(row, ref=ref) for _ in range(n_calls)], repeat, memory=False)
+    results['individual/latency'] = {'seconds': single['seconds'] / n_calls, 'median_seconds': single['median_seconds'] / n_calls}
+
+    for n in sizes:
+        df = synthetic_athletes(n, ref)
+        batch = measure(lambda: calculate_metrics_batch(df, ref=ref), repeat, memory)
+        batch['rows_per_sec'] = n / batch['seconds']
+        results[f'batch/{n}'] = batch
+        cache = ResultCache(max_entries=2 * n)
+
+        def cold():
+            cache.clear()
+            cache.score(df)
+
+        results[f'cache/cold/{n}'] = measure(cold, repeat, memory)
+        # a re-upload with a few corrected rows, new values on every run so they always miss
+        rows = np.linspace(0, n - 1, min(CACHE_EDITS, n)).astype(int)
+        uploads = iter([df.assign(body_mass_kg=df['body_mass_kg'].to_numpy() + np.isin(np.arange(n), rows) * (i + 1) / 10)
+                        for i in range(repeat + memory)])
+        results[f'cache/edited/{n}'] = measure(lambda: cache.score(next(uploads)), repeat, memory)
+        for name in (f'cache/cold/{n}', f'cache/edited/{n}'):
+            results[name]['rows_per_sec'] = n / results[name]['seconds']
+        check = measure(lambda: validate_inputs(df, ref), repeat, memory)
+        check['rows_per_sec'] = n / check['seconds']
+        results[f'validate/{n}'] = check
+        scored = calculate_metrics_batch(df, ref=ref)
+        for fmt in formats:
+            if fmt == 'xlsx' and n > XLSX_MAX_ROWS:
+                continue
+            export = measure(lambda: export_bytes(scored, fmt), repeat, memory)
+            export['rows_per_sec'] = n / export['seconds']
+            results[f'export/{fmt}/{n}'] = export
+        print(f"  {n:>9,} rows done", file=sys.stderr)
+    return results
+
+
+# --- Reporting ---
+def report(results, baseline=None, threshold=0.2):
+    regressions = []
+    print(f"{'benchmark':<24}{'time':>12}{'rows/s':>14}{'peak MB':>10}{'vs base':>10}")
+    for name, r in results.items():
+        rate = f"{r['rows_per_sec']:,.0f}" if 'rows_per_sec' in r else ''
+        peak = f"{r['peak_mb']:.1f}" if 'peak_mb' in r else ''
+        change = ''
+        if baseline and name in baseline['results']:
+            ratio = r['seconds'] / baseline['results'][name]['seconds'] - 1
+            change = f"{ratio:+.0%}"
+            if ratio > threshold:
+                regressions.append(name)
+                change += ' !'
+        print(f"{name:<24}{_fmt_seconds(r['seconds']):>12}{rate:>14}{peak:>10}{change:>10}")
+    return regressions
+
+
+def _fmt_seconds(s):
+    return f"{s * 1e6:.0f} us" if s < 1e-3 else f"{s * 1e3:.1f} ms" if s < 1 else f"{s:.2f} s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark; the fastest is kept")
+    parser.add_argument("--formats", nargs="+", choices=list(EXPORT_FORMATS), default=available_formats())
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory pass")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown counted as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, not args.no_memory, args.formats)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    regressions = report(results, baseline, args.threshold)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                       'machine': platform.machine(), 'results': results}, f, indent=2)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
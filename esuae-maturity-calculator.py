@@ -1,8 +1,22 @@
 import streamlit as st
+import altair as alt
 import pandas as pd
 import numpy as np
 import datetime
+import functools
+import hashlib
+import logging
+import os
 from io import BytesIO
+from matcal.banding import BAND, BAND_BASES, SQUAD, band_summary, bio_band
+from matcal.engine import INPUT_COLUMNS, RESULT_DECIMALS, STATUS_LABELS, apply_result_schema, calculate_metrics, calculate_metrics_batch
+from matcal.io import EXPORT_FORMATS, available_formats, export_bytes, read_table
+from matcal.instrument import profiled, recent, stage
+from matcal.longitudinal import DATE as HISTORY_DATE, DEFAULT_HISTORY, KEY as HISTORY_KEY, TRAJECTORY_COLUMNS, AthleteHistory
+from matcal.reference import get_reference
+from matcal.scenario import CUBE_CATEGORIES, CUBE_METRICS, what_if
+from matcal.store import ResultsStore
+from matcal.validate import invalid_rows, validate_inputs
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Elite Sport UAE Maturity Calculator", layout="wide")
@@ -12,69 +26,97 @@ logo_col, title_col = st.columns([1, 4])
 logo_col.image("ESUAE Logo.png", width=100)
 title_col.title("Elite Sport UAE Maturity Calculator")
 
+# --- Stage Logging ---
+stage_log = logging.getLogger('matcal')
+if not stage_log.handlers:
+    stage_log.addHandler(logging.StreamHandler())
+    stage_log.setLevel(os.environ.get('MATCAL_LOG_LEVEL', 'INFO'))
+
 # --- Data Loader ---
-@st.cache_data
+@st.cache_resource
 def load_data():
-    xls = pd.ExcelFile("Maturation_calculator.xlsx")
-    return {sheet: xls.parse(sheet) for sheet in xls.sheet_names}
-
-data_sheets = load_data()
-metric_df = data_sheets['Metric coefficients']
-sa_df = data_sheets['SA']
-error_df = data_sheets['Errors']
-
-# --- Calculation Helper ---
-def calculate_metrics(row):
-    dob = pd.to_datetime(row['dob'])
-    meas = pd.to_datetime(row.get('measurement_date', datetime.date.today()))
-    age_years = (meas - dob).days / 365.25
-    rounded_age = round(age_years * 2) / 2
-    mom_in = row['mother_height_cm'] * 0.393701
-    adj_mom_cm = (2.803 + 0.953 * mom_in) * 2.54
-    dad_in = row['father_height_cm'] * 0.393701
-    adj_dad_cm = (2.316 + 0.955 * dad_in) * 2.54
-    midparent_cm = (adj_mom_cm + adj_dad_cm) / 2
-    coeff = metric_df.loc[metric_df['Age'] == rounded_age].iloc[0]
-    if row['sex'] == 'Male':
-        h_coef, w_coef = coeff['Stature (in)'], coeff['Weight (lb)']
-        m_coef, intercept = coeff['Midparent Stature (in)'], coeff['Beta']
-    else:
-        h_coef, w_coef = coeff['Height'], coeff['Weight']
-        m_coef, intercept = coeff['Md parent'], coeff['Intersect']
-    ph = h_coef * row['standing_height_cm'] + w_coef * row['body_mass_kg'] + m_coef * midparent_cm + intercept
-    err = error_df.loc[error_df['Age'] == rounded_age].iloc[0]
-    ci_val = err.get(0.9, err.get('0.9'))
-    ci_low, ci_high = ph - ci_val, ph + ci_val
-    pp = row['standing_height_cm'] / ph * 100
-    pa_col = '%PAH Males' if row['sex'] == 'Male' else '%PAH females'
-    ba = sa_df.loc[(sa_df[pa_col] - pp).abs().idxmin(), 'Age']
-    ba_ca = ba - age_years
-    timing = 'Early' if ba_ca > 1 else 'Late' if ba_ca <= -1 else 'On Time'
-    if pp < 85:
-        status = '<85% Pre-PHV'
-    elif pp < 90:
-        status = '85-90% Approaching-PHV'
-    elif pp < 95:
-        status = '90-95% Circa-PHV'
-    else:
-        status = '>95% Post-PHV'
-    return pd.Series({
-        'Athlete': row['athlete_name'],
-        'Chronological Age (y)': round(age_years, 2),
-        'Biological Age (y)': round(ba, 2),
-        'BA-CA (y)': round(ba_ca, 2),
-        'Height (cm)': row['standing_height_cm'],
-        'Body Mass (kg)': row['body_mass_kg'],
-        '% Predicted Height': round(pp, 1),
-        'Predicted Adult Height (cm)': round(ph, 2),
-        '90% CI Lower': f"{ci_low:.2f}",
-        '90% CI Upper': f"{ci_high:.2f}",
-        'Maturity Status': status,
-        'Maturity Timing': timing
-    })
+    with stage('load_data'):
+        return get_reference()
+
+@st.cache_resource
+def athlete_history():
+    return AthleteHistory(path=DEFAULT_HISTORY)
+
+ref = load_data()
+
+# --- Group Stage Caches ---
+CACHE_TTL = 3600
+CACHE_ENTRIES = 8
+
+def upload_digest(upload):
+    # hash each uploaded file once; reruns reuse the digest for the same upload
+    key = f"digest-{upload.file_id}"
+    if key not in st.session_state:
+        st.session_state[key] = hashlib.sha256(upload.getvalue()).hexdigest()
+    return st.session_state[key]
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner="Reading upload...")
+def parse_upload(digest, name, _upload):
+    with stage('parse', file=name, bytes=_upload.size) as record:
+        df = read_table(BytesIO(_upload.getvalue()), name)
+        record['rows'] = len(df)
+    return df
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner="Checking inputs...")
+def validated_upload(digest, _df):
+    with stage('validate', rows=len(_df)) as record:
+        clean, errors = validate_inputs(_df, ref)
+        record['invalid_rows'] = invalid_rows(errors)
+    return clean, errors
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner="Calculating...")
+def group_results(digest, interpolate_ba, _df):
+    # plain batch scoring: per-row result caching costs more than it saves at upload sizes
+    # (see the cache/* benchmarks); identical re-uploads are already cached by digest
+    with stage('compute', rows=len(_df)):
+        return calculate_metrics_batch(_df, interpolate_ba, ref=ref)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def group_export(digest, interpolate_ba, fmt, _results):
+    with stage('export', rows=len(_results), format=fmt):
+        return export_bytes(_results, fmt)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner="Evaluating scenarios...")
+def scenario_frame(base, interpolate_ba, ranges):
+    # ranges: axis -> (start, stop, step); the whole grid is one what_if call
+    grid = {}
+    for axis, (start, stop, step) in ranges.items():
+        if axis == 'measurement_date':
+            grid[axis] = pd.date_range(start, stop, freq=step)
+        else:
+            grid[axis] = np.arange(start, stop + step / 2, step)
+    with stage('what_if', rows=int(np.prod([len(v) for v in grid.values()]))):
+        return what_if(base, interpolate_ba, ref=ref, **grid).to_frame()
+
+@st.cache_data(show_spinner=False)
+def template_excel():
+    template = pd.DataFrame([{  
+        'athlete_name': [''], 'dob': ['YYYY-MM-DD'], 'measurement_date': ['YYYY-MM-DD'],
+        'sex': ['Male'], 'standing_height_cm': [''], 'body_mass_kg': [''],
+        'mother_height_cm': [''], 'father_height_cm': ['']
+    }])
+    buf = BytesIO()
+    with pd.ExcelWriter(buf, engine='openpyxl') as writer:
+        template.to_excel(writer, index=False, sheet_name='Data')
+    return buf.getvalue()
+
+# --- Display Formatting ---
+RESULT_COLUMN_CONFIG = {col: st.column_config.NumberColumn(format=f"%.{d}f") for col, d in RESULT_DECIMALS.items()}
+RESULT_COLUMN_CONFIG.update({col: st.column_config.NumberColumn(format="%.2f") for col in TRAJECTORY_COLUMNS[1:]})
 
 # --- Sidebar Navigation & Inputs ---
-view = st.sidebar.selectbox("Mode", ["Individual", "Group"])
+view = st.sidebar.selectbox("Mode", ["Individual", "Group", "Longitudinal"])
+interpolate_ba = st.sidebar.checkbox("Interpolate biological age", value=False)
+FORMAT_LABELS = {'xlsx': "Excel", 'csv': "CSV", 'parquet': "Parquet"}
+export_fmt = st.sidebar.selectbox("Export Format", [f for f in FORMAT_LABELS if f in available_formats()], format_func=FORMAT_LABELS.get)
+export_suffix, export_mime = EXPORT_FORMATS[export_fmt]
+show_diagnostics = st.sidebar.checkbox("Show diagnostics", value=False)
+diag = st.sidebar.expander("Diagnostics", expanded=True) if show_diagnostics else None
 
 if view == "Individual":
     st.sidebar.header("Individual Data Inputs")
@@ -90,7 +132,8 @@ if view == "Individual":
     if athlete_name:
         st.markdown(f"<h4 style='text-align:center'>{athlete_name}</h4>", unsafe_allow_html=True)
     st.write("")
-    if all([athlete_name, standing_height, body_mass, mother_height, father_height]):
+    complete = all([athlete_name, standing_height, body_mass, mother_height, father_height])
+    if complete:
         df_row = pd.DataFrame([{  
             'athlete_name': athlete_name,
             'dob': dob, 'measurement_date': meas_date,
@@ -98,7 +141,17 @@ if view == "Individual":
             'body_mass_kg': body_mass, 'mother_height_cm': mother_height,
             'father_height_cm': father_height
         }])
-        res = calculate_metrics(df_row.iloc[0])
+        row, input_errors = validate_inputs(df_row, ref)
+    INPUT_LABELS = {'dob': "Date of Birth", 'measurement_date': "Measurement Date", 'age': "Age",
+                    'standing_height_cm': "Standing Height (cm)", 'body_mass_kg': "Body Mass (kg)",
+                    'mother_height_cm': "Mother's Height (cm)", 'father_height_cm': "Father's Height (cm)"}
+    if not complete:
+        st.info("Please complete all sidebar inputs to view results.")
+    elif len(input_errors):
+        st.error("These inputs cannot be scored:\n" + "\n".join(
+            f"- {INPUT_LABELS.get(column, column)} ({value}): {error}" for column, value, error in zip(input_errors['column'], input_errors['value'], input_errors['error'])))
+    else:
+        res = calculate_metrics(row.iloc[0], interpolate_ba, ref=ref)
         for title, keys, cols in [
             ("Age Calculations", ['Chronological Age (y)','Biological Age (y)','BA-CA (y)'], 3),
             ("Anthropometry", ['Height (cm)','Body Mass (kg)'], 2),
@@ -107,43 +160,144 @@ if view == "Individual":
             st.markdown(f"<h4 style='text-align:center'>{title}</h4>", unsafe_allow_html=True)
             cols_objs = st.columns(cols)
             for col_obj, key in zip(cols_objs, keys):
-                col_obj.markdown(f"<div style='text-align:center'><strong>{key}</strong><br>{res[key]}</div>", unsafe_allow_html=True)
+                col_obj.markdown(f"<div style='text-align:center'><strong>{key}</strong><br>{res[key]:.{RESULT_DECIMALS[key]}f}</div>", unsafe_allow_html=True)
         st.write("")
         b1,b2,b3 = st.columns([1,1,1])
+        individual = apply_result_schema(pd.DataFrame([res]))
         with b2:
-            towb = BytesIO()
-            pd.DataFrame([res]).to_excel(towb, index=False, engine='openpyxl')
-            towb.seek(0)
-            st.download_button("Download Results as Excel", data=towb, file_name=f"{athlete_name}_maturity.xlsx", mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    else:
-        st.info("Please complete all sidebar inputs to view results.")
+            st.download_button(f"Download Results as {FORMAT_LABELS[export_fmt]}", data=export_bytes(individual, export_fmt), file_name=f"{athlete_name}_maturity{export_suffix}", mime=export_mime)
+            if st.button("Save to Results Store"):
+                ResultsStore().append(individual, row)
+                st.success("Saved")
 
-else:
+        # --- What-if Scenarios ---
+        with st.expander("What-if Scenarios"):
+            AXIS_LABELS = {'standing_height_cm': "Standing Height (cm)", 'body_mass_kg': "Body Mass (kg)", 'measurement_date': "Measurement Date"}
+            w1, w2, w3 = st.columns(3)
+            y_axis = w1.selectbox("Rows", list(AXIS_LABELS), format_func=AXIS_LABELS.get)
+            x_axis = w2.selectbox("Columns", [a for a in AXIS_LABELS if a != y_axis], format_func=AXIS_LABELS.get)
+            metric = w3.selectbox("Metric", [*list(CUBE_METRICS)[1:], *CUBE_CATEGORIES])
+            ranges = {}
+            for axis in (y_axis, x_axis):
+                if axis == 'measurement_date':
+                    two_years = datetime.timedelta(days=730)
+                    latest = max(dob + datetime.timedelta(days=round(20 * 365.25)), meas_date + two_years)
+                    start, stop = st.slider(AXIS_LABELS[axis], min_value=dob, max_value=latest,
+                                            value=(max(dob, meas_date - two_years), meas_date + two_years))
+                    ranges[axis] = (start, stop, 'W')
+                else:
+                    base_value = standing_height if axis == 'standing_height_cm' else body_mass
+                    lo, hi = st.slider(AXIS_LABELS[axis], 20.0, 220.0, (max(20.0, base_value - 15), min(220.0, base_value + 15)), step=0.5)
+                    ranges[axis] = (lo, hi, 0.5)
+            grid = scenario_frame(df_row.iloc[0].to_dict(), interpolate_ba, ranges)
+            if metric in CUBE_CATEGORIES:
+                color = alt.Color(f"{metric}:N", scale=alt.Scale(domain=list(grid[metric].cat.categories)))
+            else:
+                color = alt.Color(f"{metric}:Q", scale=alt.Scale(scheme='viridis'))
+            heatmap = alt.Chart(grid.dropna(subset=[metric])).mark_rect().encode(
+                x=alt.X(f"{x_axis}:O", title=AXIS_LABELS[x_axis], axis=alt.Axis(labelOverlap=True)),
+                y=alt.Y(f"{y_axis}:O", title=AXIS_LABELS[y_axis], sort='descending', axis=alt.Axis(labelOverlap=True)),
+                color=color, tooltip=[x_axis, y_axis, metric])
+            st.altair_chart(heatmap, width='stretch')
+            age_lo, age_hi = ref.age_range()
+            st.caption(f"Other inputs stay at the sidebar values. Blank cells fall outside the reference ages ({age_lo:g}-{age_hi:g} y).")
+
+elif view == "Group":
     st.sidebar.header("Group Data Inputs")
-    template = pd.DataFrame([{  
-        'athlete_name': [''], 'dob': ['YYYY-MM-DD'], 'measurement_date': ['YYYY-MM-DD'],
-        'sex': ['Male'], 'standing_height_cm': [''], 'body_mass_kg': [''],
-        'mother_height_cm': [''], 'father_height_cm': ['']
-    }])
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-        template.to_excel(writer, index=False, sheet_name='Data')
-    buf.seek(0)
     st.sidebar.markdown("1. Download Excel template below  ")
     st.sidebar.markdown("2. Populate file with athlete data in all columns  ")
     st.sidebar.markdown("3. Upload Excel file  ")
     upload = st.sidebar.file_uploader("Upload Dataset", type=["csv","xlsx"])
-    st.sidebar.download_button("Download Excel Template", buf, file_name="template.xlsx", mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    st.sidebar.download_button("Download Excel Template", template_excel(), file_name="template.xlsx", mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     st.header("Group Maturity Calculations")
     if upload:
-        if upload.name.endswith('.xlsx'):
-            df = pd.read_excel(upload, parse_dates=['dob','measurement_date'])
-        else:
-            df = pd.read_csv(upload, parse_dates=['dob','measurement_date'])
-        results = df.apply(calculate_metrics, axis=1)
+        digest = upload_digest(upload)
+        df, errors = validated_upload(digest, parse_upload(digest, upload.name, upload))
+        results = group_results(digest, interpolate_ba, df)
+        if len(errors):
+            st.warning(f"{invalid_rows(errors)} rows were skipped because of invalid inputs; the other {len(results)} were scored.")
+            with st.expander("Input errors"):
+                # row 0 is the first data row of the upload
+                st.dataframe(errors, hide_index=True)
+                st.download_button("Download Error Report", data=errors.to_csv(index=False), file_name="input_errors.csv", mime="text/csv")
         st.subheader("Group Results")
-        st.dataframe(results)
-        bout = BytesIO()
-        results.to_excel(bout, index=False, engine='openpyxl')
-        bout.seek(0)
-        st.download_button("Download Group Results as Excel", data=bout, file_name="batch_results.xlsx", mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        st.dataframe(results, column_config=RESULT_COLUMN_CONFIG)
+        # built on click, not on every rerun
+        export = functools.partial(group_export, digest, interpolate_ba, export_fmt, results)
+        st.download_button(f"Download Group Results as {FORMAT_LABELS[export_fmt]}", data=export, file_name=f"batch_results{export_suffix}", mime=export_mime)
+        if st.button("Save to Results Store"):
+            with stage('store_append', rows=len(results)):
+                ResultsStore().append(results, df)
+            st.success(f"{len(results)} results saved")
+
+        # --- Bio-banding ---
+        # bands come from the cached results, so changing them never recalculates
+        st.subheader("Bio-banding")
+        k1, k2, k3 = st.columns(3)
+        basis = k1.radio("Band by", list(BAND_BASES), format_func=lambda b: BAND_BASES[b][0], horizontal=True)
+        edges_text = k2.text_input("Band edges", ", ".join(f"{e:g}" for e in BAND_BASES[basis][2]), key=f"band_edges_{basis}")
+        squad_col = k3.selectbox("Squad column", [None, *[c for c in df.columns if c not in INPUT_COLUMNS]], format_func=lambda c: "None" if c is None else c)
+        try:
+            with stage('bio_band', rows=len(results)):
+                bands = bio_band(results, basis, [float(e) for e in edges_text.replace(';', ',').split(',') if e.strip()])
+                summary = band_summary(results, bands, df[squad_col] if squad_col else None)
+        except ValueError as e:
+            st.error(f"Invalid band edges: {e}")
+        else:
+            st.dataframe(summary, column_config={
+                **{col: st.column_config.NumberColumn(format="%.2f") for col in summary.columns if col.startswith('Mean')},
+                **{label: st.column_config.ProgressColumn(label, format="percent", min_value=0, max_value=1) for label in STATUS_LABELS},
+            })
+            banded = results.assign(**{BAND: bands})
+            if squad_col:
+                banded.insert(1, SQUAD, df[squad_col])
+            st.download_button(f"Download Banded Results as {FORMAT_LABELS[export_fmt]}", data=functools.partial(export_bytes, banded, export_fmt), file_name=f"bio_bands{export_suffix}", mime=export_mime)
+        if show_diagnostics and diag.button("Profile this upload", help="Re-run parse, compute and export uncached under cProfile"):
+            with st.spinner("Profiling..."), profiled() as prof:
+                profile_df, _ = validate_inputs(read_table(BytesIO(upload.getvalue()), upload.name), ref)
+                export_bytes(calculate_metrics_batch(profile_df, interpolate_ba, ref=ref), export_fmt)
+            st.subheader("Profile")
+            st.code(prof['stats'])
+
+else:
+    st.sidebar.header("Longitudinal Data Inputs")
+    st.sidebar.markdown("Upload repeated measurements using the Group template columns. Only measurements that are new or changed since the last upload are calculated; a changed measurement replaces the earlier one.")
+    upload = st.sidebar.file_uploader("Upload Measurements", type=["csv","xlsx"], key="longitudinal_upload")
+    st.header("Longitudinal Tracking")
+    history = athlete_history()
+    if upload:
+        digest = upload_digest(upload)
+        if st.session_state.get('history_upload') != (digest, interpolate_ba):
+            added = history.update(parse_upload(digest, upload.name, upload), interpolate_ba)
+            if added:
+                history.save()
+            st.session_state['history_upload'] = (digest, interpolate_ba)
+            st.sidebar.success(f"{added} new or changed measurements calculated")
+            if len(history.errors):
+                st.sidebar.warning(f"{invalid_rows(history.errors)} rows skipped because of invalid inputs")
+                st.sidebar.dataframe(history.errors, hide_index=True)
+    if len(history):
+        athlete = st.selectbox("Athlete", sorted(history.history[HISTORY_KEY].unique()))
+        track = history.athlete(athlete).set_index(HISTORY_DATE)
+        c1, c2 = st.columns(2)
+        c1.markdown("<h4 style='text-align:center'>% Predicted Height</h4>", unsafe_allow_html=True)
+        c1.line_chart(track['% Predicted Height'])
+        c2.markdown("<h4 style='text-align:center'>BA-CA (y)</h4>", unsafe_allow_html=True)
+        c2.line_chart(track['BA-CA (y)'])
+        st.dataframe(track, column_config=RESULT_COLUMN_CONFIG)
+        export = functools.partial(export_bytes, history.history, export_fmt)
+        st.download_button(f"Download Full History as {FORMAT_LABELS[export_fmt]}", data=export, file_name=f"maturity_history{export_suffix}", mime=export_mime)
+    else:
+        st.info("Upload measurements to start the athlete history.")
+
+# --- Diagnostics Panel ---
+if show_diagnostics:
+    records = pd.DataFrame(list(recent)[::-1], columns=['stage', 'seconds', 'rows', 'rows_per_sec', 'rss_mb', 'stage_peak_mb'])
+    diag.caption("Recent pipeline stages in this server process (cached stages do not re-run).")
+    diag.dataframe(records.head(20), hide_index=True, column_config={
+        'seconds': st.column_config.NumberColumn(format="%.3f"),
+        'rows_per_sec': st.column_config.NumberColumn("rows/s", format="%.0f"),
+        'rss_mb': st.column_config.NumberColumn("RSS MB", format="%.0f"),
+        'stage_peak_mb': st.column_config.NumberColumn("stage peak +MB", format="%.0f",
+                                                       help="Peak RSS during the stage above the RSS it started at"),
+    })
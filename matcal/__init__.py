@@ -0,0 +1,33 @@
+# Headless maturity calculator engine. Submodules are imported lazily so the
+# CLI and batch jobs only pay for pandas/NumPy when they actually score data.
+import importlib
+
+_EXPORTS = {
+    'calculate_metrics': 'engine',
+    'calculate_metrics_batch': 'engine',
+    'STATUS_LABELS': 'engine',
+    'TIMING_LABELS': 'engine',
+    'INPUT_COLUMNS': 'engine',
+    'read_table': 'io',
+    'write_table': 'io',
+    'export_bytes': 'io',
+    'EXPORT_FORMATS': 'io',
+    'ResultCache': 'memo',
+    'get_reference': 'reference',
+    'load_reference_tables': 'reference',
+    'Reference': 'reference',
+    'SAIndex': 'reference',
+    'what_if': 'scenario',
+    'bio_band': 'banding',
+    'band_summary': 'banding',
+    'ScenarioCube': 'scenario',
+    'validate_inputs': 'validate',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
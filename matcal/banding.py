@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from .engine import STATUS_LABELS
+
+BAND = 'Bio Band'
+SQUAD = 'Squad'
+# basis -> (result column, unit used in band labels, default edges)
+BAND_BASES = {
+    'pah': ('% Predicted Height', '%', [85, 90, 95]),
+    'ba': ('Biological Age (y)', ' y', [11, 12, 13, 14, 15, 16]),
+}
+
+
+def band_labels(edges, unit=''):
+    edges = [f"{e:g}" for e in edges]
+    return [f"<{edges[0]}{unit}", *[f"{a}-{b}{unit}" for a, b in zip(edges, edges[1:])], f">{edges[-1]}{unit}"]
+
+
+def bio_band(results, basis='pah', edges=None):
+    # ordered band per athlete from already-scored results; re-banding never re-runs the engine.
+    # Bands use the reported (rounded) values, and a value on an edge goes to the band above
+    # it, as with the maturity status cuts.
+    column, unit, default = BAND_BASES[basis]
+    edges = np.sort(np.asarray(default if edges is None else edges, dtype=float))
+    if len(edges) == 0 or np.any(np.diff(edges) == 0):
+        raise ValueError("Band edges must be one or more distinct numbers")
+    values = results[column].to_numpy()
+    # compare in the column's precision, so a float32 92.7 is not below an edge of 92.7
+    codes = np.searchsorted(edges.astype(values.dtype), values, side='right')
+    codes = np.where(np.isnan(values), -1, codes)
+    dtype = pd.CategoricalDtype(band_labels(edges, unit), ordered=True)
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=results.index, name=BAND)
+
+
+def band_summary(results, bands, squads=None):
+    # athletes, mean ages and status mix (share of each maturity status) per band,
+    # or per squad and band when squads (aligned with results) are given
+    keys = [bands.rename(BAND)]
+    if squads is not None:
+        keys.insert(0, pd.Series(np.asarray(squads), index=results.index, name=SQUAD))
+    grouped = results.groupby(keys, observed=True, sort=True)
+    summary = grouped.agg(**{
+        'Athletes': ('Athlete', 'size'),
+        'Mean CA (y)': ('Chronological Age (y)', 'mean'),
+        'Mean BA (y)': ('Biological Age (y)', 'mean'),
+        'Mean BA-CA (y)': ('BA-CA (y)', 'mean'),
+        'Mean % Predicted Height': ('% Predicted Height', 'mean'),
+    })
+    mix = results.groupby([*keys, results['Maturity Status']], observed=True).size().unstack(fill_value=0)
+    mix = mix.reindex(columns=STATUS_LABELS, fill_value=0)
+    mix = mix.div(mix.sum(axis=1), axis=0)
+    return summary.join(mix)
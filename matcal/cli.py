@@ -0,0 +1,188 @@
+import argparse
+import logging
+import os
+import sys
+
+
+def _score(args):
+    import pandas as pd
+
+    from .instrument import stage
+    from .io import read_table, write_table
+    from .parallel import default_workers, score_files_parallel, score_parallel
+    from .reference import get_reference
+    from .validate import combine_errors, validate_inputs
+
+    workers = args.workers or default_workers()
+    with stage('load_data'):
+        ref = get_reference(args.workbook)
+    if args.chunksize:
+        from .stream import score_stream
+
+        if args.store:
+            raise ValueError("--store cannot be combined with --chunksize")
+        with stage('stream', chunksize=args.chunksize, workers=workers) as record:
+            stats = score_stream(args.input, args.output, args.chunksize, args.format, args.interpolate_ba,
+                                 args.workbook, workers)
+            record['rows'] = stats['rows']
+        print(f"scored {stats['rows']} rows in {stats['seconds']:.2f} s ({stats['rows_per_sec']:,.0f} rows/s)", file=sys.stderr)
+        _report_errors(stats['errors'], args.errors)
+        return
+    if len(args.input) == 1 or args.store:
+        # the store needs each row's measurement date, so keep the parsed inputs
+        with stage('parse', files=len(args.input)) as record:
+            frames = [read_table(path) for path in args.input]
+            record['rows'] = sum(len(frame) for frame in frames)
+        with stage('validate', rows=record['rows']):
+            checked = [validate_inputs(frame, ref) for frame in frames]
+            df = checked[0][0] if len(checked) == 1 else pd.concat([clean for clean, _ in checked], ignore_index=True)
+            errors = combine_errors([(path, errors) for path, (_, errors) in zip(args.input, checked)])
+        with stage('compute', rows=len(df), workers=workers):
+            results = score_parallel(df, workers, args.interpolate_ba, args.workbook)
+    else:
+        with stage('parse+compute', files=len(args.input), workers=workers) as record:
+            scored = score_files_parallel(args.input, workers, args.interpolate_ba, args.workbook)
+            results = pd.concat([results for results, _ in scored], ignore_index=True)
+            errors = combine_errors([(path, errors) for path, (_, errors) in zip(args.input, scored)])
+            record['rows'] = len(results)
+    with stage('export', rows=len(results), format=args.format or 'auto'):
+        write_table(results, args.output, args.format)
+    if args.store:
+        from .store import ResultsStore
+
+        with stage('store_append', rows=len(results)):
+            ResultsStore(args.store).append(results, df)
+    _report_errors(errors, args.errors)
+
+
+def _report_errors(errors, dest):
+    from .io import write_table
+    from .validate import invalid_rows
+
+    if dest:
+        write_table(errors, dest)
+    if len(errors):
+        hint = f"see {dest}" if dest else "use --errors FILE for the report"
+        print(f"skipped {invalid_rows(errors)} invalid rows ({len(errors)} problems; {hint})", file=sys.stderr)
+
+
+def _query(args):
+    from .io import write_table
+    from .store import ResultsStore
+
+    store = ResultsStore(args.store)
+    if args.compact:
+        store.compact()
+    results = store.query(args.columns, args.athlete, args.start, args.end, args.sex, args.status, args.timing,
+                          latest_only=not args.all_versions)
+    write_table(results, args.output, args.format)
+
+
+def _track(args):
+    from .io import read_table, write_table
+    from .longitudinal import AthleteHistory
+    from .reference import get_reference
+    from .validate import invalid_rows
+
+    get_reference(args.workbook)
+    history = AthleteHistory(args.key, args.history, args.workbook)
+    added = 0
+    for path in args.input:
+        added += history.update(read_table(path), args.interpolate_ba)
+        if len(history.errors):
+            print(f"{path}: skipped {invalid_rows(history.errors)} invalid rows", file=sys.stderr)
+    if added:
+        history.save()
+    print(f"{added} new or changed measurements, {len(history)} in history", file=sys.stderr)
+    if args.output:
+        write_table(history.history, args.output, args.format)
+
+
+def _serve(args):
+    from .service import run
+
+    try:
+        run(args.host, args.port, args.workbook, args.max_batch, args.max_delay_ms / 1000)
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mat-cal", description="Elite Sport UAE maturity calculator")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log per-stage timings as JSON lines on stderr")
+    parser.add_argument("--profile", metavar="PATH", help="write a cProfile dump of the run to PATH")
+    sub = parser.add_subparsers(dest="command", required=True)
+    score = sub.add_parser("score", help="score a CSV/Excel file of athletes")
+    score.add_argument("input", nargs="+", help="input .csv or .xlsx files (scored in order), or - for CSV on stdin")
+    score.add_argument("-o", "--output", default="-", help="output file (.csv, .parquet, .xlsx), or - for stdout (CSV unless -f is given)")
+    score.add_argument("-f", "--format", choices=["csv", "parquet", "xlsx"], help="output format (default: from the output suffix)")
+    score.add_argument("--workbook", help="reference workbook (default: Maturation_calculator.xlsx)")
+    score.add_argument("--interpolate-ba", action="store_true", help="interpolate biological age between SA rows")
+    score.add_argument("--chunksize", type=int, metavar="N",
+                       help="stream the input in chunks of N rows and report throughput")
+    score.add_argument("--store", metavar="DIR", help="also append the results to a results store")
+    score.add_argument("--errors", metavar="PATH",
+                       help="write the per-row report of skipped invalid rows (csv, parquet or xlsx)")
+    score.add_argument("-j", "--workers", type=int, default=1, metavar="N",
+                       help="score in N worker processes; 0 uses every available core (default: 1)")
+    score.set_defaults(func=_score)
+    query = sub.add_parser("query", help="read assessments back from a results store")
+    query.add_argument("--store", metavar="DIR", help="results store (default: results_store/ next to the workbook)")
+    query.add_argument("--athlete", nargs="+")
+    query.add_argument("--start", help="first measurement date, YYYY-MM-DD")
+    query.add_argument("--end", help="last measurement date, YYYY-MM-DD")
+    query.add_argument("--sex", nargs="+", choices=["Male", "Female"])
+    query.add_argument("--status", nargs="+", help="Maturity Status labels, e.g. '90-95%% Circa-PHV'")
+    query.add_argument("--timing", nargs="+", choices=["Late", "On Time", "Early"])
+    query.add_argument("--columns", nargs="+", help="only read these columns")
+    query.add_argument("--all-versions", action="store_true", help="keep superseded re-scores of the same athlete/date")
+    query.add_argument("--compact", action="store_true", help="merge the store's files before querying")
+    query.add_argument("-o", "--output", default="-", help="output file (.csv, .parquet, .xlsx), or - for stdout")
+    query.add_argument("-f", "--format", choices=["csv", "parquet", "xlsx"], help="output format (default: from the output suffix)")
+    query.set_defaults(func=_query)
+    track = sub.add_parser("track", help="add measurements to a longitudinal history and derive trajectories")
+    track.add_argument("input", nargs="+", help="input .csv or .xlsx files with repeated measurements")
+    track.add_argument("--history", required=True, help="history Parquet file, created if missing")
+    track.add_argument("--key", default="athlete_name", help="input column identifying an athlete (default: athlete_name)")
+    track.add_argument("-o", "--output", help="also write the full history with trajectories (.csv, .parquet, .xlsx)")
+    track.add_argument("-f", "--format", choices=["csv", "parquet", "xlsx"], help="output format (default: from the output suffix)")
+    track.add_argument("--workbook", help="reference workbook (default: Maturation_calculator.xlsx)")
+    track.add_argument("--interpolate-ba", action="store_true", help="interpolate biological age between SA rows")
+    track.set_defaults(func=_track)
+    serve = sub.add_parser("serve", help="run the local HTTP scoring service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workbook", help="reference workbook (default: Maturation_calculator.xlsx)")
+    serve.add_argument("--max-batch", type=int, default=256, help="largest micro-batch of single requests (default: 256)")
+    serve.add_argument("--max-delay-ms", type=float, default=2.0,
+                       help="how long a micro-batch waits for more requests (default: 2 ms)")
+    serve.set_defaults(func=_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(stream=sys.stderr, format="%(message)s")
+        logging.getLogger("matcal").setLevel(logging.INFO)
+    try:
+        if args.profile:
+            from .instrument import profiled
+
+            with profiled() as prof:
+                args.func(args)
+            prof['profile'].dump_stats(args.profile)
+        else:
+            args.func(args)
+    except BrokenPipeError:
+        # downstream closed the pipe (e.g. `| head`); silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError, KeyError) as e:
+        print(f"mat-cal: error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
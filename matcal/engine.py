@@ -0,0 +1,156 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from .reference import get_reference
+
+STATUS_LABELS = ['<85% Pre-PHV', '85-90% Approaching-PHV', '90-95% Circa-PHV', '>95% Post-PHV']
+STATUS_CUTS = [85, 90, 95]
+TIMING_LABELS = ['Late', 'On Time', 'Early']
+SEX_LABELS = ['Male', 'Female']
+INPUT_COLUMNS = ['athlete_name', 'dob', 'measurement_date', 'sex', 'standing_height_cm',
+                 'body_mass_kg', 'mother_height_cm', 'father_height_cm']
+
+# --- Result Schema ---
+# numbers stay numeric (float32) and labels are ordered categoricals; string formatting
+# happens only where results are displayed, with these decimals
+RESULT_DECIMALS = {
+    'Chronological Age (y)': 2,
+    'Biological Age (y)': 2,
+    'BA-CA (y)': 2,
+    'Height (cm)': 1,
+    'Body Mass (kg)': 1,
+    '% Predicted Height': 1,
+    'Predicted Adult Height (cm)': 2,
+    '90% CI Lower': 2,
+    '90% CI Upper': 2,
+}
+RESULT_DTYPES = {
+    'Sex': pd.CategoricalDtype(SEX_LABELS),
+    **{col: np.float32 for col in RESULT_DECIMALS},
+    'Maturity Status': pd.CategoricalDtype(STATUS_LABELS, ordered=True),
+    'Maturity Timing': pd.CategoricalDtype(TIMING_LABELS, ordered=True),
+}
+RESULT_COLUMNS = ['Athlete', *RESULT_DTYPES]
+RESULT_SCHEMA_VERSION = 2
+
+
+def apply_result_schema(results):
+    return results.astype(RESULT_DTYPES)
+
+
+# --- Calculation Helper ---
+def calculate_metrics(row, interpolate_ba=False, ref=None):
+    ref = get_reference() if ref is None else ref
+    dob = pd.to_datetime(row['dob'])
+    meas = pd.to_datetime(row.get('measurement_date', datetime.date.today()))
+    age_years = (meas - dob).days / 365.25
+    rounded_age = round(age_years * 2) / 2
+    mom_in = row['mother_height_cm'] * 0.393701
+    adj_mom_cm = (2.803 + 0.953 * mom_in) * 2.54
+    dad_in = row['father_height_cm'] * 0.393701
+    adj_dad_cm = (2.316 + 0.955 * dad_in) * 2.54
+    midparent_cm = (adj_mom_cm + adj_dad_cm) / 2
+    i = ref.age_index(rounded_age)
+    coeff = ref['coef_male'][i] if row['sex'] == 'Male' else ref['coef_female'][i]
+    h_coef, w_coef, m_coef, intercept = coeff
+    ph = h_coef * row['standing_height_cm'] + w_coef * row['body_mass_kg'] + m_coef * midparent_cm + intercept
+    ci_val = ref['ci90'][i]
+    ci_low, ci_high = ph - ci_val, ph + ci_val
+    pp = row['standing_height_cm'] / ph * 100
+    ba_index = ref.ba_male if row['sex'] == 'Male' else ref.ba_female
+    ba = float(ba_index.lookup(pp, interpolate_ba))
+    ba_ca = ba - age_years
+    timing = 'Early' if ba_ca > 1 else 'Late' if ba_ca <= -1 else 'On Time'
+    if pp < 85:
+        status = '<85% Pre-PHV'
+    elif pp < 90:
+        status = '85-90% Approaching-PHV'
+    elif pp < 95:
+        status = '90-95% Circa-PHV'
+    else:
+        status = '>95% Post-PHV'
+    return pd.Series({
+        'Athlete': row['athlete_name'],
+        'Sex': 'Male' if row['sex'] == 'Male' else 'Female',
+        'Chronological Age (y)': round(age_years, 2),
+        'Biological Age (y)': round(ba, 2),
+        'BA-CA (y)': round(ba_ca, 2),
+        'Height (cm)': row['standing_height_cm'],
+        'Body Mass (kg)': row['body_mass_kg'],
+        '% Predicted Height': round(pp, 1),
+        'Predicted Adult Height (cm)': round(ph, 2),
+        '90% CI Lower': round(ci_low, 2),
+        '90% CI Upper': round(ci_high, 2),
+        'Maturity Status': status,
+        'Maturity Timing': timing
+    })
+
+
+# --- Batch Calculation ---
+def as_datetime(col):
+    # pd.to_datetime walks already-parsed columns element by element; skip it for those
+    return col if pd.api.types.is_datetime64_any_dtype(col) else pd.to_datetime(col)
+
+def input_dates(df):
+    dob = as_datetime(df['dob'])
+    if 'measurement_date' in df:
+        meas = as_datetime(df['measurement_date'])
+    else:
+        meas = pd.Series(pd.Timestamp(datetime.date.today()), index=df.index)
+    return dob, meas
+
+def midparent_height(mother_cm, father_cm):
+    adj_mom_cm = (2.803 + 0.953 * (mother_cm * 0.393701)) * 2.54
+    adj_dad_cm = (2.316 + 0.955 * (father_cm * 0.393701)) * 2.54
+    return (adj_mom_cm + adj_dad_cm) / 2
+
+
+def score_arrays(age_years, male, height, mass, midparent_cm, interpolate_ba=False, ref=None):
+    # the engine arithmetic on plain arrays; inputs broadcast against each other, so the same
+    # code scores a batch of rows or a whole what-if grid. Returns unrounded values and
+    # status/timing category codes.
+    ref = get_reference() if ref is None else ref
+    rounded_age = np.round(age_years * 2) / 2
+    i = ref.age_index(rounded_age)
+    coef = [np.where(male, ref['coef_male'][i, k], ref['coef_female'][i, k]) for k in range(4)]
+    h_coef, w_coef, m_coef, intercept = coef
+    ph = h_coef * height + w_coef * mass + m_coef * midparent_cm + intercept
+    ci_val = ref['ci90'][i]
+    pp = height / ph * 100
+    ba = np.where(male, ref.ba_male.lookup(pp, interpolate_ba), ref.ba_female.lookup(pp, interpolate_ba))
+    ba_ca = ba - age_years
+    return {
+        'age': age_years, 'ba': ba, 'ba_ca': ba_ca, 'pp': pp, 'ph': ph,
+        'ci_low': ph - ci_val, 'ci_high': ph + ci_val,
+        'status': np.searchsorted(STATUS_CUTS, pp, side='right'),
+        'timing': np.where(ba_ca > 1, 2, np.where(ba_ca <= -1, 0, 1)),
+    }
+
+
+def calculate_metrics_batch(df, interpolate_ba=False, ref=None):
+    ref = get_reference() if ref is None else ref
+    dob, meas = input_dates(df)
+    age_years = ((meas - dob).dt.days / 365.25).to_numpy()
+    midparent_cm = midparent_height(df['mother_height_cm'].to_numpy(dtype=float), df['father_height_cm'].to_numpy(dtype=float))
+    male = (df['sex'] == 'Male').to_numpy()
+    height = df['standing_height_cm'].to_numpy(dtype=float)
+    mass = df['body_mass_kg'].to_numpy(dtype=float)
+    m = score_arrays(age_years, male, height, mass, midparent_cm, interpolate_ba, ref)
+    results = pd.DataFrame({
+        'Athlete': df['athlete_name'].to_numpy(),
+        'Sex': pd.Categorical.from_codes((~male).astype(np.int8), dtype=RESULT_DTYPES['Sex']),
+        'Chronological Age (y)': np.round(age_years, 2),
+        'Biological Age (y)': np.round(m['ba'], 2),
+        'BA-CA (y)': np.round(m['ba_ca'], 2),
+        'Height (cm)': height,
+        'Body Mass (kg)': mass,
+        '% Predicted Height': np.round(m['pp'], 1),
+        'Predicted Adult Height (cm)': np.round(m['ph'], 2),
+        '90% CI Lower': np.round(m['ci_low'], 2),
+        '90% CI Upper': np.round(m['ci_high'], 2),
+        'Maturity Status': pd.Categorical.from_codes(m['status'], dtype=RESULT_DTYPES['Maturity Status']),
+        'Maturity Timing': pd.Categorical.from_codes(m['timing'], dtype=RESULT_DTYPES['Maturity Timing']),
+    }, index=df.index)
+    return apply_result_schema(results)
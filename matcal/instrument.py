@@ -0,0 +1,114 @@
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger('matcal.stages')
+
+# most recent stage records in this process, newest last
+recent = collections.deque(maxlen=200)
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except (OSError, AttributeError):
+        return None
+
+
+def _hwm_mb():
+    # peak RSS since the last reset (Linux only)
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return None
+
+
+def _reset_hwm():
+    # writing 5 to clear_refs restarts VmHWM from the current RSS (Linux 4.0+)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+# [start RSS, peak so far] of each stage in progress. The high-water mark is process-wide, so a
+# stage starting inside another (or in another thread) folds the peak so far into the open ones
+# before resetting it.
+_open = []
+_open_lock = threading.Lock()
+
+
+def _start_peak():
+    with _open_lock:
+        hwm = _hwm_mb()
+        if hwm is None or not _reset_hwm():
+            return None
+        for state in _open:
+            state[1] = max(state[1], hwm)
+        rss = _rss_mb()
+        state = [rss, rss]
+        _open.append(state)
+        return state
+
+
+def _stage_peak_mb(state):
+    # growth of the peak RSS over the stage, or None where it cannot be measured
+    if state is None:
+        return None
+    with _open_lock:
+        _open.remove(state)
+        return max(state[1], _hwm_mb()) - state[0]
+
+
+@contextlib.contextmanager
+def stage(name, rows=None, **fields):
+    # times a pipeline stage and emits one structured record; set record['rows'] inside the block
+    # when the row count is only known afterwards
+    record = {'stage': name, 'rows': rows, **fields}
+    peak = _start_peak()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        if record['rows'] is not None and record['seconds'] > 0:
+            record['rows_per_sec'] = record['rows'] / record['seconds']
+        record['rss_mb'] = _rss_mb()
+        record['stage_peak_mb'] = _stage_peak_mb(peak)
+        record['time'] = time.time()
+        recent.append(record)
+        logger.info(json.dumps(record, default=str))
+
+
+@contextlib.contextmanager
+def profiled(sort='cumulative', limit=30):
+    # cProfile everything inside the block; the yielded dict gets 'stats' (text) and 'profile'
+    profile = cProfile.Profile()
+    out = {}
+    profile.enable()
+    try:
+        yield out
+    finally:
+        profile.disable()
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats(sort).print_stats(limit)
+        out['stats'] = text.getvalue()
+        out['profile'] = profile
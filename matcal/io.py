@@ -0,0 +1,123 @@
+import importlib.util
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+EXCEL_MAX_ROWS = 1_048_576
+XLSX_BLOCK_ROWS = 10_000
+
+# format -> (file suffix, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def _suffix(name):
+    return os.path.splitext(str(name))[1].lower()
+
+
+def available_formats():
+    return [f for f in EXPORT_FORMATS if f != 'parquet' or importlib.util.find_spec('pyarrow')]
+
+
+def read_table(source, name=None):
+    # source is a path, '-' for stdin, or a file-like upload with its name passed separately
+    name = name or (source if isinstance(source, str) else '')
+    if source == '-':
+        source = sys.stdin
+    # date columns are left as read; validate_inputs parses them with explicit formats
+    if _suffix(name) == '.xlsx':
+        return pd.read_excel(source)
+    return pd.read_csv(source)
+
+
+# --- Excel Writer ---
+class XlsxWriter:
+    # row-streaming .xlsx writer: xlsxwriter in constant_memory mode when installed,
+    # otherwise openpyxl's write-only workbook; both flush rows instead of building cells
+    def __init__(self, path, sheet_name='Sheet1'):
+        self.path = path
+        self.rows = 0
+        self._header = False
+        if importlib.util.find_spec('xlsxwriter'):
+            import xlsxwriter
+
+            self._book = xlsxwriter.Workbook(path, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd'})
+            self._sheet = self._book.add_worksheet(sheet_name)
+            self._append = lambda row: self._sheet.write_row(self.rows, 0, row)
+        else:
+            from openpyxl import Workbook
+
+            self._book = Workbook(write_only=True)
+            self._sheet = self._book.create_sheet(sheet_name)
+            self._append = self._sheet.append
+
+    def write(self, df):
+        if self.rows + len(df) + (not self._header) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} rows; use csv or parquet")
+        if not self._header:
+            self._append([str(c) for c in df.columns])
+            self.rows += 1
+            self._header = True
+        for start in range(0, len(df), XLSX_BLOCK_ROWS):
+            block = df.iloc[start:start + XLSX_BLOCK_ROWS]
+            # widen float32 through its shortest repr so cells read 206.17, not 206.1699981689453
+            widen = {c: 'float64' for c, t in block.dtypes.items() if t == 'float32'}
+            block = block.astype({c: str for c in widen}).astype(widen)
+            block = block.astype(object).where(block.notna(), None)
+            for row in block.itertuples(index=False, name=None):
+                self._append(row)
+                self.rows += 1
+
+    def close(self):
+        if hasattr(self._book, 'save'):
+            self._book.save(self.path)
+        else:
+            self._book.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_table(df, dest, fmt=None):
+    fmt = fmt or _suffix(dest).lstrip('.') or 'csv'
+    if dest == '-':
+        dest = sys.stdout
+    if fmt == 'csv':
+        df.to_csv(dest, index=False)
+    elif fmt == 'parquet':
+        df.to_parquet(sys.stdout.buffer if dest is sys.stdout else dest, index=False)
+    elif fmt == 'xlsx':
+        if dest is sys.stdout:
+            dest = sys.stdout.buffer
+        if isinstance(dest, str):
+            with XlsxWriter(dest) as writer:
+                writer.write(df)
+        else:
+            dest.write(export_bytes(df, 'xlsx'))
+    else:
+        raise ValueError(f"Unsupported output format: {fmt}")
+
+
+def export_bytes(df, fmt):
+    # whole export as bytes, for download buttons
+    if fmt == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    if fmt == 'parquet':
+        return df.to_parquet(index=False)
+    if fmt == 'xlsx':
+        # constant-memory xlsxwriter needs a real file to flush rows into
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'export.xlsx')
+            with XlsxWriter(path) as writer:
+                writer.write(df)
+            with open(path, 'rb') as f:
+                return f.read()
+    raise ValueError(f"Unsupported output format: {fmt}")
@@ -0,0 +1,135 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .engine import INPUT_COLUMNS, calculate_metrics_batch
+from .instrument import stage
+from .memo import row_keys
+from .reference import get_reference
+from .validate import ERROR_COLUMNS, _blank, validate_inputs
+
+# the app's history, in the working directory like the results store; kept out of .matcal_cache,
+# which is safe to delete
+DEFAULT_HISTORY = os.environ.get('MATCAL_HISTORY', 'athlete_history.parquet')
+KEY = 'Athlete ID'
+DATE = 'Measurement Date'
+METHOD = 'BA Interpolated'
+# calculation inputs kept with each history row (name, date and sex are already in the results),
+# so rows can be re-scored when the BA method changes
+STORED_INPUTS = ['dob', 'standing_height_cm', 'body_mass_kg', 'mother_height_cm', 'father_height_cm']
+TRAJECTORY_COLUMNS = ['Measurement #', 'Years Since Previous', 'Growth Velocity (cm/y)', 'Mass Velocity (kg/y)',
+                      'Change in % Predicted Height', 'Change in BA-CA (y)']
+
+
+def add_trajectories(history):
+    # per-athlete deltas against the previous measurement, in one grouped pass
+    history = history.sort_values([KEY, DATE], kind='stable')
+    g = history.groupby(KEY, sort=False, observed=True)
+    years = (g[DATE].diff().dt.days / 365.25).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = g['Height (cm)'].diff().to_numpy() / years
+        mass_velocity = g['Body Mass (kg)'].diff().to_numpy() / years
+    return history.assign(**{
+        'Measurement #': (g.cumcount() + 1).astype(np.int32),
+        'Years Since Previous': years.astype(np.float32),
+        'Growth Velocity (cm/y)': np.where(years > 0, velocity, np.nan).astype(np.float32),
+        'Mass Velocity (kg/y)': np.where(years > 0, mass_velocity, np.nan).astype(np.float32),
+        'Change in % Predicted Height': g['% Predicted Height'].diff().astype(np.float32),
+        'Change in BA-CA (y)': g['BA-CA (y)'].diff().astype(np.float32),
+    })
+
+
+def _stored_inputs(history):
+    # history rows back as engine inputs, keyed like a validated upload
+    return pd.DataFrame({
+        KEY: history[KEY],
+        'athlete_name': history['Athlete'],
+        'measurement_date': history[DATE],
+        'sex': history['Sex'].astype(object),
+        **{c: history[c] for c in STORED_INPUTS},
+    })
+
+
+def _content(inputs):
+    return pd.MultiIndex.from_arrays([inputs[KEY], inputs['measurement_date'], row_keys(inputs)])
+
+
+class AthleteHistory:
+    # scored measurements per athlete, one row per (athlete, date). update() only scores rows
+    # whose inputs are new or changed; a corrected measurement replaces the earlier one.
+    def __init__(self, key='athlete_name', path=None, workbook=None):
+        self.key = key
+        self.path = path
+        self.workbook = workbook
+        self.history = None
+        self.errors = pd.DataFrame(columns=ERROR_COLUMNS)
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.history = pd.read_parquet(path)
+
+    def __len__(self):
+        return 0 if self.history is None else len(self.history)
+
+    def update(self, df, interpolate_ba=False):
+        # returns the number of new or changed measurements scored
+        with self._lock:
+            return self._update(df, interpolate_ba)
+
+    def _update(self, df, interpolate_ba):
+        # invalid rows are left out of the history; their report is kept in self.errors
+        ref = get_reference(self.workbook)
+        clean, errors = validate_inputs(df, ref)
+        # rows without a key cannot be placed in any athlete's history
+        blank = _blank(df[self.key])
+        if blank.any():
+            missing = pd.DataFrame({'row': df.index[blank], 'column': self.key,
+                                    'value': df.loc[blank, self.key].astype('string').to_numpy(), 'error': "missing"})
+            errors = pd.concat([errors, missing], ignore_index=True).sort_values('row', kind='stable', ignore_index=True)
+            clean = clean[~blank.loc[clean.index]]
+        df, self.errors = clean, errors
+        incoming = df.assign(**{KEY: df[self.key], 'measurement_date': df['measurement_date'].dt.normalize()})
+        incoming = incoming[[KEY, *INPUT_COLUMNS]].drop_duplicates([KEY, 'measurement_date'], keep='last')
+        kept = self.history
+        if kept is not None:
+            # rows scored with the other BA method are re-scored from their stored inputs, so one
+            # trajectory never compares values from both methods
+            stale = kept[METHOD].to_numpy() != interpolate_ba
+            if stale.any():
+                incoming = pd.concat([_stored_inputs(kept[stale]), incoming])
+                incoming = incoming.drop_duplicates([KEY, 'measurement_date'], keep='last')
+                kept = kept[~stale]
+            new = incoming[~_content(incoming).isin(_content(_stored_inputs(kept)))]
+        else:
+            new = incoming
+        if new.empty:
+            return 0
+        with stage('longitudinal_compute', rows=len(new)):
+            scored = calculate_metrics_batch(new, interpolate_ba, ref=ref)
+            scored.insert(0, DATE, new['measurement_date'].to_numpy())
+            scored.insert(0, KEY, new[KEY].to_numpy())
+            scored = scored.assign(**{c: new[c].to_numpy() for c in STORED_INPUTS}, **{METHOD: interpolate_ba})
+        if kept is None or kept.empty:
+            self.history = add_trajectories(scored).reset_index(drop=True)
+            return len(new)
+        # a changed measurement replaces the stored one, and only athletes with new or changed
+        # rows need their deltas recomputed
+        replaced = pd.MultiIndex.from_frame(kept[[KEY, DATE]]).isin(pd.MultiIndex.from_frame(scored[[KEY, DATE]]))
+        kept = kept[~replaced]
+        affected = kept[KEY].isin(scored[KEY].unique())
+        updated = add_trajectories(pd.concat([kept[affected].drop(columns=TRAJECTORY_COLUMNS), scored]))
+        self.history = pd.concat([kept[~affected], updated], ignore_index=True)
+        return len(new)
+
+    def athlete(self, athlete_id):
+        h = self.history
+        return h[h[KEY] == athlete_id].sort_values(DATE)
+
+    def save(self, path=None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + '.tmp'
+        with self._lock:
+            self.history.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
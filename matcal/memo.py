@@ -0,0 +1,121 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .engine import RESULT_SCHEMA_VERSION, calculate_metrics_batch, input_dates
+from .reference import CACHE_DIRNAME, WORKBOOK, get_reference, workbook_hash
+
+KEY_COLUMNS = ['dob', 'measurement_date', 'sex', 'standing_height_cm', 'body_mass_kg',
+               'mother_height_cm', 'father_height_cm']
+
+
+def row_keys(df, salt=0):
+    # content hash of the normalized calculation inputs; athlete_name is not an input
+    dob, meas = input_dates(df)
+    norm = pd.DataFrame({
+        'dob': dob.to_numpy('datetime64[ns]').view('int64'),
+        'measurement_date': meas.to_numpy('datetime64[ns]').view('int64'),
+        'male': (df['sex'] == 'Male').to_numpy(),
+        **{c: df[c].to_numpy(dtype=float) for c in KEY_COLUMNS[3:]},
+        'salt': np.uint64(salt),
+    })
+    return pd.util.hash_pandas_object(norm, index=False).to_numpy()
+
+
+class ResultCache:
+    # results of rows scored before, keyed by input content and reference workbook. Entries are
+    # held column-wise and matched to a frame with one hash lookup (pd.Index.get_indexer), so a
+    # re-upload with a few edited rows only scores those rows. Least recently used entries go first.
+    def __init__(self, max_entries=200_000, workbook=None, persist=False, cache_dir=None):
+        workbook = os.path.abspath(workbook or WORKBOOK)
+        self.workbook = workbook
+        self.workbook_hash = workbook_hash(workbook)
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._reset()
+        self.path = None
+        if persist:
+            cache_dir = cache_dir or os.path.join(os.path.dirname(workbook), CACHE_DIRNAME)
+            self.path = os.path.join(cache_dir, f"result-cache-{self.workbook_hash}-v{RESULT_SCHEMA_VERSION}.pkl")
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as f:
+                    keys, self._results, self._used = pickle.load(f)
+                self._keys = pd.Index(keys)
+                self._clock = int(self._used.max(initial=0))
+
+    def _reset(self):
+        self._keys = pd.Index(np.empty(0, dtype=np.uint64))
+        self._results = None
+        # last use of each entry, in calls to score()
+        self._used = np.empty(0, dtype=np.int64)
+        self._clock = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _salt(self, interpolate_ba):
+        return (int(self.workbook_hash, 16) >> 1) ^ int(interpolate_ba)
+
+    def score(self, df, interpolate_ba=False):
+        key_array = row_keys(df, self._salt(interpolate_ba))
+        with self._lock:
+            return self._score(df, key_array, interpolate_ba)
+
+    def _score(self, df, key_array, interpolate_ba):
+        if len(df) == 0:
+            # nothing to look up, and a fresh cache does not know its columns yet
+            return calculate_metrics_batch(df, interpolate_ba, ref=get_reference(self.workbook))
+        self._clock += 1
+        pos = self._keys.get_indexer(key_array)
+        miss = pos < 0
+        self.hits += int((~miss).sum())
+        self.misses += int(miss.sum())
+        if miss.any():
+            # repeated inputs within one frame are scored once
+            inverse, new_keys = pd.factorize(key_array[miss])
+            first = np.empty(len(new_keys), dtype=np.intp)
+            first[inverse[::-1]] = np.arange(len(inverse))[::-1]
+            fresh = calculate_metrics_batch(df[miss].iloc[first], interpolate_ba, ref=get_reference(self.workbook))
+            fresh = fresh.drop(columns='Athlete').reset_index(drop=True)
+            pos[miss] = len(self._keys) + inverse
+            self._keys = self._keys.append(pd.Index(new_keys))
+            self._results = fresh if self._results is None else pd.concat([self._results, fresh], ignore_index=True)
+            self._used = np.append(self._used, np.zeros(len(new_keys), dtype=np.int64))
+            self._dirty = True
+        self._used[pos] = self._clock
+        results = self._results.take(pos).set_axis(df.index)
+        # the name column as it is, rather than a round trip through an object array
+        results.insert(0, 'Athlete', df['athlete_name'])
+        self._evict()
+        return results
+
+    def _evict(self):
+        if len(self._keys) <= self.max_entries:
+            return
+        keep = np.sort(np.argsort(self._used, kind='stable')[-self.max_entries:])
+        self._keys = self._keys[keep]
+        self._results = self._results.take(keep).reset_index(drop=True)
+        self._used = self._used[keep]
+
+    def save(self):
+        # write the cache to disk if persistence is on and anything new was computed
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump((self._keys.to_numpy(), self._results, self._used), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.hits = self.misses = 0
+            self._dirty = True
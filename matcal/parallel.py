@@ -0,0 +1,77 @@
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .engine import calculate_metrics_batch
+from .io import read_table
+from .reference import get_reference
+from .validate import validate_inputs
+
+MIN_ROWS_PER_TASK = 10_000
+
+_workbook = None
+
+
+# --- Worker Side ---
+def _init_worker(workbook):
+    # load the reference tables once per worker process
+    global _workbook
+    _workbook = workbook
+    get_reference(workbook)
+
+
+def _score_frame(df, interpolate_ba):
+    return calculate_metrics_batch(df, interpolate_ba, ref=get_reference(_workbook))
+
+
+def _score_file(path, interpolate_ba, ref=None):
+    # returns (results for the valid rows, error report for the rest)
+    ref = ref or get_reference(_workbook)
+    clean, errors = validate_inputs(read_table(path), ref)
+    return calculate_metrics_batch(clean, interpolate_ba, ref=ref), errors
+
+
+# --- Pool Helpers ---
+def default_workers():
+    return len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+
+def make_pool(workers=None, workbook=None):
+    return ProcessPoolExecutor(max_workers=workers or default_workers(),
+                               initializer=_init_worker, initargs=(workbook,))
+
+
+def imap_ordered(pool, fn, items, *args, max_pending):
+    # like pool.map, but keeps at most max_pending tasks in flight so input can be streamed
+    pending = collections.deque()
+    for item in items:
+        pending.append(pool.submit(fn, item, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# --- Parallel Scoring ---
+def score_parallel(df, workers=None, interpolate_ba=False, workbook=None, rows_per_task=None):
+    workers = workers or default_workers()
+    if workers == 1 or len(df) <= MIN_ROWS_PER_TASK:
+        return calculate_metrics_batch(df, interpolate_ba, ref=get_reference(workbook))
+    rows_per_task = rows_per_task or max(MIN_ROWS_PER_TASK, -(-len(df) // (workers * 4)))
+    bounds = np.arange(0, len(df), rows_per_task)
+    parts = (df.iloc[b:b + rows_per_task] for b in bounds)
+    with make_pool(workers, workbook) as pool:
+        return pd.concat(list(imap_ordered(pool, _score_frame, parts, interpolate_ba, max_pending=2 * workers)))
+
+
+def score_files_parallel(paths, workers=None, interpolate_ba=False, workbook=None):
+    # one task per file; (results, errors) pairs come back in the order of paths
+    workers = min(workers or default_workers(), len(paths))
+    if workers <= 1:
+        ref = get_reference(workbook)
+        return [_score_file(path, interpolate_ba, ref) for path in paths]
+    with make_pool(workers, workbook) as pool:
+        return list(pool.map(_score_file, paths, [interpolate_ba] * len(paths)))
@@ -0,0 +1,142 @@
+import functools
+import hashlib
+import importlib.resources
+import os
+
+import numpy as np
+
+# --- Reference Tables ---
+# the workbook ships as package data; in a checkout that file links to the one at the repo root
+WORKBOOK = os.environ.get(
+    "MATCAL_WORKBOOK",
+    os.path.realpath(importlib.resources.files(__package__) / "data" / "Maturation_calculator.xlsx"),
+)
+CACHE_DIRNAME = ".matcal_cache"
+# bump when build_reference_tables changes, so older .npz caches are rebuilt
+TABLES_VERSION = 2
+REFERENCE_SHEETS = ['Metric coefficients', 'Errors', 'SA']
+MALE_COEFS = ['Stature (in)', 'Weight (lb)', 'Midparent Stature (in)', 'Beta']
+FEMALE_COEFS = ['Height', 'Weight', 'Md parent', 'Intersect']
+
+
+def workbook_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def _half_year_grid(ages, values, age0, size):
+    # place values on a dense half-year grid so a rounded age is a direct index
+    grid = np.full((size,) + values.shape[1:], np.nan)
+    grid[np.rint((ages - age0) * 2).astype(int)] = values
+    return grid
+
+
+def build_reference_tables(path):
+    import pandas as pd
+
+    sheets = pd.read_excel(path, sheet_name=REFERENCE_SHEETS)
+    metric = sheets['Metric coefficients'].dropna(subset=['Age'])
+    err = sheets['Errors'].rename(columns=str)
+    sa = sheets['SA']
+    ages = np.concatenate([metric['Age'].to_numpy(), err['Age'].to_numpy()])
+    age0 = ages.min()
+    size = int(np.rint((ages.max() - age0) * 2)) + 1
+    tables = {
+        'age0': np.float64(age0),
+        'coef_male': _half_year_grid(metric['Age'].to_numpy(), metric[MALE_COEFS].to_numpy(float), age0, size),
+        'coef_female': _half_year_grid(metric['Age'].to_numpy(), metric[FEMALE_COEFS].to_numpy(float), age0, size),
+        'ci50': _half_year_grid(err['Age'].to_numpy(), err['0.5'].to_numpy(float), age0, size),
+        'ci90': _half_year_grid(err['Age'].to_numpy(), err['0.9'].to_numpy(float), age0, size),
+        'sa_age': sa['Age'].to_numpy(float),
+        'sa_pah_male': sa['%PAH Males'].to_numpy(float),
+        'sa_pah_female': sa['%PAH females'].to_numpy(float),
+    }
+    tables['valid'] = ~(np.isnan(tables['coef_male']).any(axis=1) | np.isnan(tables['coef_female']).any(axis=1)
+                        | np.isnan(tables['ci90']))
+    return tables
+
+
+def load_reference_tables(path=WORKBOOK, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME)
+    cache = os.path.join(cache_dir, f"reference-{workbook_hash(path)}-v{TABLES_VERSION}.npz")
+    if os.path.exists(cache):
+        with np.load(cache) as npz:
+            return {k: npz[k] for k in npz.files}
+    tables = build_reference_tables(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cache + '.tmp.npz'
+        np.savez(tmp, **tables)
+        os.replace(tmp, cache)
+    except OSError:
+        # read-only install or container: keep the tables in memory and parse again next start
+        pass
+    return tables
+
+
+class SAIndex:
+    # monotone %PAH -> SA age index, queried by binary search
+    def __init__(self, pah, age):
+        if np.any(np.diff(pah) < 0):
+            raise ValueError("SA %PAH column must be non-decreasing")
+        # keep the first row of each repeated %PAH value, as idxmin would
+        self.pah, first = np.unique(pah, return_index=True)
+        self.age = age[first]
+
+    def lookup(self, pp, interpolate=False):
+        pp = np.asarray(pp, dtype=float)
+        if interpolate:
+            return np.interp(pp, self.pah, self.age)
+        right = np.searchsorted(self.pah, pp).clip(1, len(self.pah) - 1)
+        left = right - 1
+        take_left = np.abs(self.pah[left] - pp) <= np.abs(self.pah[right] - pp)
+        return self.age[np.where(take_left, left, right)]
+
+
+class Reference:
+    # loaded reference tables plus the per-sex biological age indexes
+    def __init__(self, tables):
+        self.tables = tables
+        self.ba_male = SAIndex(tables['sa_pah_male'], tables['sa_age'])
+        self.ba_female = SAIndex(tables['sa_pah_female'], tables['sa_age'])
+
+    def __getitem__(self, key):
+        return self.tables[key]
+
+    def _positions(self, rounded_age):
+        valid = self.tables['valid']
+        pos = np.rint((np.asarray(rounded_age, dtype=float) - self.tables['age0']) * 2)
+        ok = (pos >= 0) & (pos < len(valid))
+        pos = np.where(ok, pos, 0).astype(int)
+        return pos, ok & valid[pos]
+
+    def has_age(self, rounded_age):
+        # True where the rounded age has a coefficient/error row
+        return self._positions(rounded_age)[1]
+
+    def age_range(self):
+        rows = np.flatnonzero(self.tables['valid'])
+        return float(self.tables['age0'] + rows[0] / 2), float(self.tables['age0'] + rows[-1] / 2)
+
+    def age_index(self, rounded_age):
+        # grid position of each rounded age; raises if there is no coefficient/error row
+        pos, ok = self._positions(rounded_age)
+        if not ok.all():
+            bad = sorted(set(np.atleast_1d(rounded_age)[np.atleast_1d(~ok)].tolist()))
+            raise ValueError(f"No reference data for rounded age(s): {bad}")
+        return pos
+
+
+@functools.lru_cache(maxsize=None)
+def _load_reference(path, cache_dir):
+    return Reference(load_reference_tables(path, cache_dir))
+
+
+def get_reference(path=None, cache_dir=None):
+    # one Reference per workbook per process
+    path = os.path.abspath(path or WORKBOOK)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Reference workbook not found: {path}. Pass --workbook or set MATCAL_WORKBOOK "
+                                "to the path of Maturation_calculator.xlsx")
+    return _load_reference(path, cache_dir)
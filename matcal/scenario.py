@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from .engine import RESULT_DECIMALS, RESULT_DTYPES, midparent_height, score_arrays
+from .reference import get_reference
+from .validate import validate_inputs
+
+# what-if axes, in cube order
+GRID_AXES = ['measurement_date', 'standing_height_cm', 'body_mass_kg']
+# cube metric -> score_arrays key
+CUBE_METRICS = {
+    'Chronological Age (y)': 'age',
+    'Biological Age (y)': 'ba',
+    'BA-CA (y)': 'ba_ca',
+    '% Predicted Height': 'pp',
+    'Predicted Adult Height (cm)': 'ph',
+    '90% CI Lower': 'ci_low',
+    '90% CI Upper': 'ci_high',
+}
+CUBE_CATEGORIES = {'Maturity Status': 'status', 'Maturity Timing': 'timing'}
+
+
+class ScenarioCube:
+    # what-if results on a regular grid: axes maps each varied input to its values, and every
+    # metric is an array of shape [len(values) for each axis]. Numbers are float32 (NaN where the
+    # age falls outside the reference tables); status and timing are int8 codes into
+    # RESULT_DTYPES' categories (-1 there).
+    def __init__(self, axes, values):
+        self.axes = axes
+        self.values = values
+
+    @property
+    def shape(self):
+        return tuple(len(v) for v in self.axes.values())
+
+    def __getitem__(self, metric):
+        return self.values[metric]
+
+    def to_frame(self):
+        # one row per grid point, with the axis values and the result schema's dtypes
+        grid = np.meshgrid(*self.axes.values(), indexing='ij')
+        df = pd.DataFrame({name: g.ravel() for name, g in zip(self.axes, grid)})
+        for metric in CUBE_METRICS:
+            df[metric] = self.values[metric].ravel()
+        for metric in CUBE_CATEGORIES:
+            df[metric] = pd.Categorical.from_codes(self.values[metric].ravel(), dtype=RESULT_DTYPES[metric])
+        return df
+
+    def table(self, metric, rows, columns, **at):
+        # 2-D slice for a heatmap: rows x columns, with every other axis fixed at the grid value
+        # nearest to at[axis] (default: its first value)
+        index = []
+        for name, values in self.axes.items():
+            if name in (rows, columns):
+                index.append(slice(None))
+            else:
+                target = at.get(name, values[0])
+                index.append(int(np.abs(values - np.asarray(target, dtype=values.dtype)).argmin()))
+        data = self.values[metric][tuple(index)]
+        if list(self.axes).index(rows) > list(self.axes).index(columns):
+            data = data.T
+        return pd.DataFrame(data, index=pd.Index(self.axes[rows], name=rows),
+                            columns=pd.Index(self.axes[columns], name=columns))
+
+
+def _axis(name, values):
+    if name == 'measurement_date':
+        return pd.to_datetime(np.atleast_1d(values)).to_numpy(dtype='datetime64[ns]')
+    return np.atleast_1d(np.asarray(values, dtype=float))
+
+
+def what_if(base, interpolate_ba=False, ref=None, **ranges):
+    # base is one athlete (dict or Series of input columns); ranges maps any of GRID_AXES to
+    # the values to try. The whole grid is scored with one broadcast pass over the reference tables:
+    #     what_if(athlete, standing_height_cm=np.arange(150, 180, 0.5), body_mass_kg=np.arange(40, 70))
+    ref = get_reference() if ref is None else ref
+    unknown = sorted(set(ranges) - set(GRID_AXES))
+    if unknown:
+        raise ValueError(f"Cannot vary {unknown}; choose from {GRID_AXES}")
+    axes = {name: _axis(name, ranges[name]) for name in GRID_AXES if name in ranges}
+    if any(len(v) == 0 for v in axes.values()):
+        raise ValueError("Every what-if range needs at least one value")
+
+    # the base row is validated like any input, except for the inputs the grid replaces
+    row, errors = validate_inputs(pd.DataFrame([dict(base)]), ref, drop_invalid=False)
+    ignored = set(axes) | ({'age'} if 'measurement_date' in axes else set())
+    errors = errors[~errors['column'].isin(ignored)]
+    if len(errors):
+        raise ValueError("Invalid base athlete: " + "; ".join(f"{c}: {e}" for c, e in zip(errors['column'], errors['error'])))
+    base = row.iloc[0]
+
+    # each axis becomes an array shaped to broadcast along its own dimension
+    def along(name):
+        if name not in axes:
+            return None
+        shape = [1] * len(axes)
+        shape[list(axes).index(name)] = -1
+        return axes[name].reshape(shape)
+
+    meas = along('measurement_date')
+    if meas is None:
+        age_years = np.float64((base['measurement_date'] - base['dob']).days / 365.25)
+    else:
+        age_years = ((meas - np.datetime64(base['dob'], 'ns')) // np.timedelta64(1, 'D')) / 365.25
+    height = along('standing_height_cm')
+    mass = along('body_mass_kg')
+    shape = tuple(len(v) for v in axes.values())
+    age_years = np.broadcast_to(age_years, shape)
+    # ages outside the reference tables score as NaN instead of failing the grid
+    known = ref.has_age(np.round(age_years * 2) / 2)
+    safe_age = np.where(known, age_years, ref.age_range()[0])
+    m = score_arrays(safe_age, base['sex'] == 'Male',
+                     base['standing_height_cm'] if height is None else height,
+                     base['body_mass_kg'] if mass is None else mass,
+                     midparent_height(base['mother_height_cm'], base['father_height_cm']),
+                     interpolate_ba, ref)
+    m['age'] = age_years
+    values = {}
+    for metric, key in CUBE_METRICS.items():
+        rounded = np.round(np.broadcast_to(m[key], shape), RESULT_DECIMALS[metric])
+        values[metric] = (rounded if key == 'age' else np.where(known, rounded, np.nan)).astype(np.float32)
+    for metric, key in CUBE_CATEGORIES.items():
+        values[metric] = np.where(known, np.broadcast_to(m[key], shape), -1).astype(np.int8)
+    return ScenarioCube(axes, values)
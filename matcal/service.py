@@ -0,0 +1,274 @@
+"""Local HTTP scoring service.
+
+    GET  /health         -> {"status": "ok", "requests": ..., "batches": ...}
+    POST /score          one athlete as a JSON object -> one result object
+    POST /score/batch    JSON array or CSV body (Content-Type: text/csv) ->
+                         {"results": [...], "errors": [...]}, or CSV of the valid rows
+                         when the request sends Accept: text/csv
+
+Invalid rows are skipped, not fatal: errors lists {"row", "column", "value", "error"}
+per problem, and a single /score athlete with bad inputs gets a 422 naming them.
+
+Add ?interpolate_ba=1 to interpolate biological age. Concurrent /score requests are
+queued and scored together in small vectorized micro-batches.
+"""
+import asyncio
+import io
+import json
+import logging
+import time
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+from .engine import RESULT_DECIMALS, calculate_metrics_batch
+from .reference import get_reference
+from .validate import validate_inputs
+
+logger = logging.getLogger('matcal.service')
+
+MAX_BODY = 64 * 2**20
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           411: 'Length Required', 413: 'Payload Too Large', 422: 'Unprocessable Entity',
+           500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def result_records(results):
+    # JSON-ready rows: float32 widened and re-rounded, categoricals as plain labels, NaN as null
+    out = results.astype({c: 'float64' for c in RESULT_DECIMALS}).round(RESULT_DECIMALS)
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict('records')
+
+
+def _error_message(errors):
+    return "; ".join(f"{column}: {error}" for column, error in zip(errors['column'], errors['error']))
+
+
+def _frame(records):
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise HTTPError(400, "expected a JSON object per athlete")
+    df = pd.DataFrame.from_records(records)
+    if 'athlete_name' not in df:
+        df['athlete_name'] = None
+    return df
+
+
+# --- Micro-batching ---
+class MicroBatcher:
+    # collects single-athlete requests for up to max_delay seconds (or max_batch items)
+    # and scores them with one calculate_metrics_batch call
+    def __init__(self, ref, max_batch=256, max_delay=0.002):
+        self.ref = ref
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def score(self, record, interpolate_ba=False):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, interpolate_ba, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            for flag in (False, True):
+                group = [item for item in batch if item[1] == flag]
+                if group:
+                    self._score_group(group, flag)
+            self.batches += 1
+
+    def _score_group(self, group, interpolate_ba):
+        try:
+            clean, errors = validate_inputs(_frame([g[0] for g in group]), self.ref)
+            scored = iter(result_records(calculate_metrics_batch(clean, interpolate_ba, ref=self.ref)))
+            problems = errors.groupby('row').apply(_error_message) if len(errors) else {}
+            results = [HTTPError(422, f"invalid athlete: {problems[i]}") if i in problems else next(scored)
+                       for i in range(len(group))]
+        except Exception as e:
+            # one bad athlete must not fail its neighbours: fall back to scoring one by one
+            if len(group) > 1:
+                for item in group:
+                    self._score_group([item], interpolate_ba)
+                return
+            if isinstance(e, (HTTPError, KeyError, ValueError, TypeError)):
+                e = HTTPError(getattr(e, 'status', 422), f"could not score athlete: {e}")
+            results = [e]
+        for (_, _, future), result in zip(group, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# --- HTTP Server ---
+class ScoringService:
+    def __init__(self, workbook=None, max_batch=256, max_delay=0.002):
+        self.ref = get_reference(workbook)
+        self.batcher = MicroBatcher(self.ref, max_batch, max_delay)
+        self.requests = 0
+
+    async def handle(self, method, target, headers, body):
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        interpolate_ba = query.get('interpolate_ba', ['0'])[0].lower() in ('1', 'true', 'yes')
+        if url.path == '/health':
+            if method != 'GET':
+                raise HTTPError(405, "use GET")
+            return 200, 'application/json', {'status': 'ok', 'requests': self.requests,
+                                             'batches': self.batcher.batches}
+        if method != 'POST':
+            raise HTTPError(405 if url.path in ('/score', '/score/batch') else 404, "use POST")
+        if url.path == '/score':
+            record = _json(body)
+            if not isinstance(record, dict):
+                raise HTTPError(400, "expected a JSON object")
+            return 200, 'application/json', await self.batcher.score(record, interpolate_ba)
+        if url.path == '/score/batch':
+            return await self._batch(headers, body, interpolate_ba)
+        raise HTTPError(404, f"no route for {url.path}")
+
+    async def _batch(self, headers, body, interpolate_ba):
+        csv_in = headers.get('content-type', '').startswith('text/csv')
+        csv_out = 'text/csv' in headers.get('accept', '')
+        try:
+            df = pd.read_csv(io.BytesIO(body)) if csv_in else _frame(_json(body))
+            # bulk requests are already vectorized; validate and score off the event loop
+            results, errors = await asyncio.get_running_loop().run_in_executor(
+                None, self._score_frame, df, interpolate_ba)
+        except (KeyError, ValueError, TypeError, pd.errors.ParserError) as e:
+            raise HTTPError(422, f"could not score batch: {e}") from e
+        if csv_out:
+            return 200, 'text/csv', results.to_csv(index=False)
+        return 200, 'application/json', {'results': result_records(results),
+                                         'errors': errors.astype(object).where(errors.notna(), None).to_dict('records')}
+
+    def _score_frame(self, df, interpolate_ba):
+        clean, errors = validate_inputs(df, self.ref)
+        return calculate_metrics_batch(clean, interpolate_ba, ref=self.ref), errors
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                start = time.perf_counter()
+                try:
+                    status, ctype, payload = await self.handle(method, target, headers, body)
+                except HTTPError as e:
+                    status, ctype, payload = e.status, 'application/json', {'error': str(e)}
+                except Exception:
+                    logger.exception("unhandled error for %s %s", method, target)
+                    status, ctype, payload = 500, 'application/json', {'error': "internal error"}
+                self.requests += 1
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(_response(status, ctype, payload, keep_alive))
+                await writer.drain()
+                logger.debug("%s %s %d %.1fms", method, target, status, (time.perf_counter() - start) * 1e3)
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            writer.write(_response(e.status, 'application/json', {'error': str(e)}, False))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        self.batcher.start()
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        logger.warning("mat-cal service listening on http://%s:%d", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def _json(body):
+    try:
+        return json.loads(body or b'null')
+    except ValueError as e:
+        raise HTTPError(400, f"invalid JSON: {e}") from e
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HTTPError(411, "chunked request bodies are not supported; send Content-Length")
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise HTTPError(400, "Content-Length must be a number")
+    if length < 0:
+        raise HTTPError(400, "Content-Length must not be negative")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"request body over {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, version, headers, body
+
+
+def _response(status, ctype, payload, keep_alive):
+    if not isinstance(payload, (str, bytes)):
+        payload = json.dumps(payload, default=_json_default)
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {ctype}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + payload
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def run(host='127.0.0.1', port=8000, workbook=None, max_batch=256, max_delay=0.002):
+    asyncio.run(ScoringService(workbook, max_batch, max_delay).serve(host, port))
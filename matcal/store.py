@@ -0,0 +1,154 @@
+import os
+import uuid
+
+import pandas as pd
+
+from .engine import RESULT_DTYPES, input_dates
+from .memo import row_keys
+
+# relative to the working directory; an installed workbook sits inside site-packages
+DEFAULT_STORE = os.environ.get('MATCAL_STORE', 'results_store')
+DATE = 'Measurement Date'
+SCORED_AT = 'Scored At'
+ASSESSMENT = 'Assessment ID'
+PARTITION = 'year'
+ROW_GROUP_SIZE = 64_000
+
+
+def _as_list(value):
+    return None if value is None else [value] if isinstance(value, str) else list(value)
+
+
+def _all(filters):
+    expr = None
+    for f in filters:
+        expr = f if expr is None else expr & f
+    return expr
+
+
+def assessment_ids(inputs):
+    # identity of an assessment: athlete name plus every calculation input. Re-scoring the same
+    # inputs supersedes the earlier row; different athletes sharing a name (or blank names) do not
+    norm = pd.DataFrame({'inputs': row_keys(inputs), 'athlete': inputs['athlete_name'].astype('string').to_numpy()})
+    return pd.util.hash_pandas_object(norm, index=False).to_numpy()
+
+
+def store_schema():
+    # one fixed schema for every file, so a batch whose names pandas read as numbers
+    # cannot change the Athlete type for the rest of the year
+    import pyarrow as pa
+
+    def arrow_type(dtype):
+        if isinstance(dtype, pd.CategoricalDtype):
+            return pa.dictionary(pa.int8(), pa.string(), ordered=dtype.ordered)
+        return pa.float32()
+
+    return pa.schema([(ASSESSMENT, pa.uint64()), ('Athlete', pa.string()), (DATE, pa.timestamp('ns')),
+                      *[(c, arrow_type(t)) for c, t in RESULT_DTYPES.items()], (SCORED_AT, pa.timestamp('ns'))])
+
+
+def _to_table(df):
+    # names are compared as text, so the sort order matches the stored column
+    import pyarrow as pa
+
+    df = df.astype({'Athlete': 'string', **{c: t for c, t in RESULT_DTYPES.items() if c in df}})
+    df = df.sort_values(['Athlete', DATE], kind='stable')
+    return pa.Table.from_pandas(df, schema=store_schema(), preserve_index=False)
+
+
+def _latest(df):
+    # rows from the newest scoring of each assessment; several rows of one append all stay
+    return df[df[SCORED_AT] == df.groupby(ASSESSMENT)[SCORED_AT].transform('max')]
+
+
+class ResultsStore:
+    # append-only Parquet log of scored assessments, partitioned by measurement year and
+    # sorted by athlete/date within each file so row-group statistics can skip data.
+    # Re-scoring an assessment appends a newer row; queries return the latest one.
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_STORE
+
+    def append(self, results, inputs):
+        # inputs are the validated rows the results were scored from, on the same index
+        import pyarrow.parquet as pq
+
+        if len(results) == 0:
+            return 0
+        inputs = inputs.loc[results.index]
+        df = results.reset_index(drop=True)
+        df.insert(1, DATE, input_dates(inputs)[1].dt.normalize().to_numpy())
+        df.insert(0, ASSESSMENT, assessment_ids(inputs))
+        df[SCORED_AT] = pd.Timestamp.now()
+        for year, part in df.groupby(df[DATE].dt.year, sort=False):
+            folder = os.path.join(self.root, f"{PARTITION}={year}")
+            os.makedirs(folder, exist_ok=True)
+            pq.write_table(_to_table(part), os.path.join(folder, f"part-{uuid.uuid4().hex}.parquet"),
+                           row_group_size=ROW_GROUP_SIZE)
+        return len(df)
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        schema = store_schema().append(pa.field(PARTITION, pa.int32()))
+        return ds.dataset(self.root, format='parquet', partitioning='hive', schema=schema)
+
+    def query(self, columns=None, athlete=None, start=None, end=None, sex=None, status=None, timing=None,
+              latest_only=True):
+        import pyarrow.dataset as ds
+
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns or [])
+        key_filters, value_filters = [], []
+        if start is not None:
+            start = pd.Timestamp(start)
+            key_filters += [ds.field(PARTITION) >= start.year, ds.field(DATE) >= start]
+        if end is not None:
+            end = pd.Timestamp(end)
+            key_filters += [ds.field(PARTITION) <= end.year, ds.field(DATE) <= end]
+        if athlete is not None:
+            key_filters.append(ds.field('Athlete').isin([str(a) for a in _as_list(athlete)]))
+        for col, value in (('Sex', sex), ('Maturity Status', status), ('Maturity Timing', timing)):
+            if value is not None:
+                value_filters.append(ds.field(col).isin(_as_list(value)))
+        wanted = list(columns) if columns else None
+        keys = [ASSESSMENT, SCORED_AT]
+        read = None if wanted is None else list(dict.fromkeys(wanted + (['Athlete', DATE, *keys] if latest_only else [])))
+        dataset = self._dataset()
+        df = dataset.to_table(columns=read, filter=_all(key_filters + value_filters)).to_pandas()
+        if latest_only and len(df):
+            df = _latest(df)
+            if value_filters:
+                # a matching row may have been superseded by a newer one that no longer matches,
+                # so compare against the latest Scored At over the key filters alone
+                latest = dataset.to_table(columns=keys, filter=_all(key_filters)).to_pandas()
+                latest = latest.groupby(ASSESSMENT)[SCORED_AT].max()
+                df = df[df[SCORED_AT].to_numpy() == latest.reindex(df[ASSESSMENT]).to_numpy()]
+            df = df.sort_values(['Athlete', DATE], kind='stable')
+        if wanted is not None:
+            df = df[wanted]
+        elif PARTITION in df:
+            df = df.drop(columns=PARTITION)
+        return df.astype({c: t for c, t in RESULT_DTYPES.items() if c in df}).reset_index(drop=True)
+
+    def compact(self):
+        # rewrite each year as one sorted file, dropping only rows superseded by a later
+        # scoring of the same assessment; files from before the fixed schema are rewritten to it
+        import pyarrow.parquet as pq
+
+        if not os.path.isdir(self.root):
+            return
+        for name in sorted(os.listdir(self.root)):
+            folder = os.path.join(self.root, name)
+            if not name.startswith(f"{PARTITION}="):
+                continue
+            old = [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith('.parquet')]
+            if not old:
+                continue
+            df = pd.concat([pd.read_parquet(f) for f in old], ignore_index=True)
+            df = _latest(df)
+            tmp = os.path.join(folder, f"part-{uuid.uuid4().hex}.parquet.tmp")
+            pq.write_table(_to_table(df), tmp, row_group_size=ROW_GROUP_SIZE)
+            os.replace(tmp, tmp[:-len('.tmp')])
+            for f in old:
+                os.remove(f)
@@ -0,0 +1,142 @@
+import contextlib
+import sys
+import time
+
+import pandas as pd
+
+from .engine import RESULT_COLUMNS, apply_result_schema, calculate_metrics_batch
+from .io import EXPORT_FORMATS, XlsxWriter, _suffix
+from .reference import get_reference
+from .validate import combine_errors, validate_inputs
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+# --- Chunked Readers ---
+def _iter_excel_chunks(path, chunksize):
+    # openpyxl read-only mode streams rows instead of loading the whole sheet
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buf = []
+        start = 0
+        for row in rows:
+            buf.append(row)
+            if len(buf) == chunksize:
+                yield _excel_frame(buf, header, start)
+                start += len(buf)
+                buf = []
+        if buf:
+            yield _excel_frame(buf, header, start)
+    finally:
+        wb.close()
+
+
+def _excel_frame(rows, header, start):
+    # row labels continue across chunks, as read_csv's do, so error reports line up
+    return pd.DataFrame.from_records(rows, columns=header, index=pd.RangeIndex(start, start + len(rows)))
+
+
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE, name=None):
+    name = name or (source if isinstance(source, str) else '')
+    if source == '-':
+        source = sys.stdin
+    if _suffix(name) == '.xlsx':
+        return _iter_excel_chunks(source, chunksize)
+    # dates are parsed with explicit formats by validate_inputs
+    return pd.read_csv(source, chunksize=chunksize)
+
+
+# --- Chunked Writers ---
+class ChunkWriter:
+    # appends result chunks to a CSV, Parquet or XLSX file without holding earlier chunks
+    def __init__(self, dest, fmt=None):
+        self.fmt = fmt or _suffix(dest).lstrip('.') or 'csv'
+        if self.fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported output format: {self.fmt}")
+        if self.fmt != 'csv' and dest == '-':
+            raise ValueError(f"Streaming {self.fmt} output needs a file path, not stdout")
+        self.dest = sys.stdout if dest == '-' else dest
+        self._started = False
+        self._parquet = None
+        self._xlsx = XlsxWriter(dest) if self.fmt == 'xlsx' else None
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            df.to_csv(self.dest, index=False, header=not self._started, mode='a' if self._started else 'w')
+        elif self._xlsx is not None:
+            self._xlsx.write(df)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            # names are written as text: a chunk whose names are all blank (read as float) or
+            # numeric IDs must not fix a different Athlete type for the rest of the file
+            df = df.astype({'Athlete': 'string'})
+            if self._parquet is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._parquet = pq.ParquetWriter(self.dest, table.schema)
+            else:
+                table = pa.Table.from_pandas(df, schema=self._parquet.schema, preserve_index=False)
+            self._parquet.write_table(table)
+        self._started = True
+
+    def close(self):
+        if not self._started:
+            # no chunks at all: still leave a valid, empty output with the result columns
+            self.write(apply_result_schema(pd.DataFrame(columns=RESULT_COLUMNS)))
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._xlsx is not None:
+            self._xlsx.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Streaming Scorer ---
+def score_stream(sources, dest, chunksize=DEFAULT_CHUNKSIZE, fmt=None, interpolate_ba=False,
+                 workbook=None, workers=1):
+    # sources is one path (or '-') or a list of paths, scored in order into a single output;
+    # invalid rows are skipped and reported in stats['errors']
+    if isinstance(sources, str):
+        sources = [sources]
+    ref = get_reference(workbook)
+    reports = [(source, []) for source in sources]
+
+    def valid_chunks():
+        # validation is cheap and vectorized, so it runs here rather than in the workers
+        for source, found in reports:
+            for chunk in iter_chunks(source, chunksize):
+                clean, errors = validate_inputs(chunk, ref)
+                if len(errors):
+                    found.append(errors)
+                yield clean
+
+    chunks = valid_chunks()
+    start = time.perf_counter()
+    rows = 0
+    with ChunkWriter(dest, fmt) as writer, contextlib.ExitStack() as stack:
+        if workers > 1:
+            from .parallel import _score_frame, imap_ordered, make_pool
+
+            pool = stack.enter_context(make_pool(workers, workbook))
+            results = imap_ordered(pool, _score_frame, chunks, interpolate_ba, max_pending=2 * workers)
+        else:
+            results = (calculate_metrics_batch(chunk, interpolate_ba, ref=ref) for chunk in chunks)
+        for result in results:
+            writer.write(result)
+            rows += len(result)
+    seconds = time.perf_counter() - start
+    errors = combine_errors([(source, pd.concat(found, ignore_index=True) if found else pd.DataFrame())
+                             for source, found in reports])
+    return {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds else float('inf'),
+            'errors': errors}
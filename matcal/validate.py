@@ -0,0 +1,141 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from .engine import INPUT_COLUMNS
+from .reference import get_reference
+
+# tried in order; day-first only, so 03/04/2010 is always 3 April
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d']
+DATE_COLUMNS = ['dob', 'measurement_date']
+# measurement_date is optional and defaults to today, as in the engine
+REQUIRED_COLUMNS = [c for c in INPUT_COLUMNS if c != 'measurement_date']
+NUMERIC_RANGES = {
+    'standing_height_cm': (50, 250),
+    'body_mass_kg': (5, 250),
+    'mother_height_cm': (100, 230),
+    'father_height_cm': (100, 250),
+}
+SEX_VALUES = {'male': 'Male', 'm': 'Male', 'boy': 'Male', 'female': 'Female', 'f': 'Female', 'girl': 'Female'}
+ERROR_COLUMNS = ['row', 'column', 'value', 'error']
+
+
+# --- Coercion ---
+def _blank(raw):
+    return raw.isna() | (raw.astype('string').str.strip() == '').fillna(False)
+
+
+def _per_unique(raw, fn, fill):
+    # apply fn to each distinct value once and broadcast back; real files repeat dates,
+    # sexes and measurements heavily, so this is far cheaper than element-wise coercion
+    codes, uniques = pd.factorize(raw)
+    values = np.asarray(fn(pd.Series(uniques, dtype=object)))
+    return np.append(values, np.array([fill], dtype=values.dtype))[codes]
+
+
+def parse_dates(raw, formats=DATE_FORMATS):
+    # explicit formats only; anything none of them match becomes NaT
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        return raw
+    out = pd.Series(pd.NaT, index=raw.index, dtype='datetime64[ns]')
+    todo = raw.notna()
+    for fmt in formats:
+        if not todo.any():
+            break
+        parsed = pd.to_datetime(raw[todo], format=fmt, errors='coerce')
+        out[parsed.index] = parsed
+        todo &= out.isna()
+    return out
+
+
+def coerce_dates(raw, formats=DATE_FORMATS):
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        return raw.astype('datetime64[ns]'), raw.isna()
+    parsed = _per_unique(raw, lambda u: parse_dates(u, formats), np.datetime64('NaT'))
+    return pd.Series(parsed, index=raw.index), pd.Series(_per_unique(raw, _blank, True), index=raw.index)
+
+
+def coerce_numbers(raw):
+    if pd.api.types.is_numeric_dtype(raw):
+        return raw.astype(float), raw.isna()
+    parsed = _per_unique(raw, lambda u: pd.to_numeric(u, errors='coerce').astype(float), np.nan)
+    return pd.Series(parsed, index=raw.index), pd.Series(_per_unique(raw, _blank, True), index=raw.index)
+
+
+def coerce_sex(raw):
+    sex = _per_unique(raw, lambda u: u.astype(str).str.strip().str.lower().map(SEX_VALUES).astype(object), None)
+    return pd.Series(sex, index=raw.index, dtype=object)
+
+
+# --- Validation ---
+def validate_inputs(df, ref=None, date_formats=DATE_FORMATS, drop_invalid=True):
+    # one vectorized pass over the whole frame; returns (valid rows with coerced columns,
+    # error report with one line per problem). Rows keep their index labels in both.
+    # With drop_invalid=False every row is returned, with NaN/NaT where coercion failed.
+    ref = get_reference() if ref is None else ref
+    missing = [c for c in REQUIRED_COLUMNS if c not in df]
+    if missing:
+        raise ValueError(f"Missing input column(s): {missing}")
+    clean = df.copy()
+    problems = []
+
+    def check(mask, column, error, values=None):
+        if mask.any():
+            problems.append((mask, column, error, df[column] if values is None else values))
+
+    for col in DATE_COLUMNS:
+        if col not in df:
+            clean[col] = pd.Timestamp(datetime.date.today())
+            continue
+        clean[col], blank = coerce_dates(df[col], date_formats)
+        bad = clean[col].isna()
+        check(blank, col, "missing")
+        check(bad & ~blank, col, "unrecognised date (expected YYYY-MM-DD or DD/MM/YYYY)")
+    for col, (lo, hi) in NUMERIC_RANGES.items():
+        clean[col], blank = coerce_numbers(df[col])
+        bad = clean[col].isna()
+        check(blank, col, "missing")
+        check(bad & ~blank, col, "not a number")
+        check((clean[col] < lo) | (clean[col] > hi), col, f"outside {lo}-{hi}")
+    clean['sex'] = coerce_sex(df['sex'])
+    check(clean['sex'].isna(), 'sex', "expected Male or Female")
+
+    # age checks only make sense where both dates parsed
+    age = (clean['measurement_date'] - clean['dob']).dt.days / 365.25
+    check(age < 0, 'measurement_date', "before date of birth")
+    lo, hi = ref.age_range()
+    outside = (age >= 0) & ~ref.has_age(np.round(age * 2) / 2)
+    check(outside, 'age', f"age outside reference range {lo:g}-{hi:g} y", age.round(2))
+
+    if not problems or not drop_invalid:
+        return clean, _report(df, problems)
+    invalid = np.logical_or.reduce([mask.to_numpy() for mask, *_ in problems])
+    return clean[~invalid], _report(df, problems)
+
+
+def _report(df, problems):
+    if not problems:
+        return pd.DataFrame(columns=ERROR_COLUMNS)
+    errors = pd.concat([pd.DataFrame({
+        'row': df.index[mask.to_numpy()],
+        'column': column,
+        'value': values[mask].astype('string').to_numpy(),
+        'error': error,
+    }) for mask, column, error, values in problems], ignore_index=True)
+    return errors.sort_values('row', kind='stable', ignore_index=True)
+
+
+def combine_errors(reports):
+    # reports is a list of (source, error report); the source goes in a 'file' column
+    # when rows from more than one input are reported together
+    frames = [errors for _, errors in reports if len(errors)]
+    if len(reports) > 1:
+        frames = [errors.assign(file=source)[['file', *ERROR_COLUMNS]] for source, errors in reports if len(errors)]
+    if not frames:
+        return pd.DataFrame(columns=(['file'] if len(reports) > 1 else []) + ERROR_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def invalid_rows(errors):
+    return len(errors.drop_duplicates([c for c in ('file', 'row') if c in errors]))
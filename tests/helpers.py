@@ -0,0 +1,25 @@
+# sample inputs shared by the tests
+import numpy as np
+import pandas as pd
+
+from matcal.reference import get_reference
+
+
+def athletes(n=1500, seed=0):
+    # every half-year age bin with reference data, both sexes, and heights wide enough to
+    # reach both ends of the SA table
+    ref = get_reference()
+    rng = np.random.default_rng(seed)
+    bins = ref['age0'] + np.flatnonzero(ref['valid']) / 2
+    age = np.repeat(bins, -(-n // len(bins)))[:n] + rng.uniform(-0.24, 0.24, n)
+    meas = pd.Timestamp('2025-06-01') - pd.to_timedelta(rng.integers(0, 3650, n), 'D')
+    return pd.DataFrame({
+        'athlete_name': [f'Athlete {i}' for i in range(n)],
+        'dob': meas - pd.to_timedelta(np.floor(age * 365.25), 'D'),
+        'measurement_date': meas,
+        'sex': np.tile(['Male', 'Female'], -(-n // 2))[:n],
+        'standing_height_cm': rng.uniform(110, 200, n).round(1),
+        'body_mass_kg': rng.uniform(20, 100, n).round(1),
+        'mother_height_cm': rng.normal(162, 6, n).round(1),
+        'father_height_cm': rng.normal(176, 7, n).round(1),
+    })
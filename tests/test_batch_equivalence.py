@@ -0,0 +1,18 @@
+# calculate_metrics_batch must give the same output as calculate_metrics row by row
+import pandas as pd
+import pytest
+from helpers import athletes
+
+from matcal.engine import apply_result_schema, calculate_metrics, calculate_metrics_batch
+
+
+@pytest.mark.parametrize('interpolate_ba', [False, True])
+def test_batch_matches_row_by_row(interpolate_ba):
+    df = athletes()
+    batch = calculate_metrics_batch(df, interpolate_ba)
+    rows = apply_result_schema(df.apply(calculate_metrics, axis=1, interpolate_ba=interpolate_ba))
+    pd.testing.assert_frame_equal(batch, rows)
+    # the sample really does cover both sexes, every status and every timing
+    assert set(batch['Sex']) == {'Male', 'Female'}
+    assert batch['Maturity Status'].nunique() == 4
+    assert batch['Maturity Timing'].nunique() == 3
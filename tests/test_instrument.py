@@ -0,0 +1,17 @@
+# stage records
+import numpy as np
+import pytest
+
+from matcal.instrument import _hwm_mb, _reset_hwm, recent, stage
+
+
+@pytest.mark.skipif(_hwm_mb() is None or not _reset_hwm(), reason="needs Linux /proc/self/clear_refs")
+def test_stage_peak_is_measured_per_stage():
+    with stage('big'):
+        data = np.ones(25_000_000)  # 200 MB
+        del data
+    with stage('small'):
+        pass
+    big, small = list(recent)[-2:]
+    assert big['stage_peak_mb'] > 150
+    assert small['stage_peak_mb'] < 50
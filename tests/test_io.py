@@ -0,0 +1,24 @@
+# export writers
+import io
+
+import pandas as pd
+from helpers import athletes
+from openpyxl import load_workbook
+
+from matcal.engine import calculate_metrics_batch
+from matcal.io import XlsxWriter, write_table
+
+
+def test_xlsx_dates_are_formatted(tmp_path):
+    path = str(tmp_path / 'dates.xlsx')
+    with XlsxWriter(path) as writer:
+        writer.write(pd.DataFrame({'Measurement Date': pd.to_datetime(['2025-06-01', '2024-01-31'])}))
+    cells = [row[0] for row in load_workbook(path).active.iter_rows(min_row=2)]
+    assert [c.value.date().isoformat() for c in cells] == ['2025-06-01', '2024-01-31']
+    assert all(c.number_format == 'yyyy-mm-dd' for c in cells)
+
+
+def test_parquet_to_stdout(capsysbinary):
+    df = calculate_metrics_batch(athletes(20))
+    write_table(df, '-', 'parquet')
+    pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(capsysbinary.readouterr().out)), df)
@@ -0,0 +1,80 @@
+# AthleteHistory updates and trajectories
+import numpy as np
+import pandas as pd
+from helpers import athletes
+from openpyxl import load_workbook
+
+from matcal.cli import main
+from matcal.engine import calculate_metrics_batch
+from matcal.longitudinal import DATE, KEY, METHOD, AthleteHistory
+from matcal.reference import WORKBOOK, get_reference
+
+
+def test_blank_key_is_reported_not_scored():
+    df = athletes(30)
+    df.loc[3, 'athlete_name'] = None
+    df.loc[5, 'athlete_name'] = ' '
+    history = AthleteHistory()
+    assert history.update(df) == 28
+    assert not history.history[KEY].isna().any()
+    assert list(history.errors[history.errors['column'] == 'athlete_name']['row']) == [3, 5]
+
+
+def two_visits(n=20):
+    df = athletes(n)
+    later = df.assign(measurement_date=df['measurement_date'] + pd.Timedelta(days=200),
+                      standing_height_cm=df['standing_height_cm'] + 3)
+    return pd.concat([df, later], ignore_index=True)
+
+
+def test_corrected_measurement_replaces_the_stored_one():
+    df = two_visits()
+    history = AthleteHistory()
+    assert history.update(df) == 40
+    assert history.update(df) == 0
+    df.loc[25, 'body_mass_kg'] += 2
+    assert history.update(df) == 1
+    assert len(history) == 40
+    track = history.athlete('Athlete 5')
+    assert list(track['Body Mass (kg)']) == list(df.loc[[5, 25], 'body_mass_kg'].astype('float32'))
+    assert list(track['Measurement #']) == [1, 2]
+
+
+def test_switching_ba_method_rescores_the_whole_history():
+    df = two_visits()
+    history = AthleteHistory()
+    history.update(df)
+    # one athlete re-uploaded with interpolation on; every stored row follows the new method
+    assert history.update(df[df['athlete_name'] == 'Athlete 0'], interpolate_ba=True) == 40
+    assert history.history[METHOD].all()
+    expected = AthleteHistory()
+    expected.update(df, interpolate_ba=True)
+    columns = [KEY, DATE, 'Biological Age (y)', 'Change in BA-CA (y)']
+    pd.testing.assert_frame_equal(history.history.sort_values([KEY, DATE])[columns].reset_index(drop=True),
+                                  expected.history.sort_values([KEY, DATE])[columns].reset_index(drop=True))
+
+
+def test_track_uses_the_workbook_it_is_given(tmp_path):
+    # same coefficients with every intercept raised by 2 cm
+    book = load_workbook(WORKBOOK)
+    sheet = book['Metric coefficients']
+    header = [c.value for c in sheet[1]]
+    for row in sheet.iter_rows(min_row=2):
+        for name in ('Beta', 'Intersect'):
+            if isinstance(row[header.index(name)].value, (int, float)):
+                row[header.index(name)].value += 2
+    workbook = str(tmp_path / 'shifted.xlsx')
+    book.save(workbook)
+    source = str(tmp_path / 'in.csv')
+    two_visits().to_csv(source, index=False)
+
+    def track(*extra):
+        out = str(tmp_path / f'out{len(extra)}.csv')
+        assert main(['track', source, '--history', str(tmp_path / f'h{len(extra)}.parquet'), '-o', out, *extra]) == 0
+        return pd.read_csv(out).sort_values([KEY, DATE])
+
+    default, shifted = track(), track('--workbook', workbook)
+    expected = calculate_metrics_batch(two_visits(), ref=get_reference(workbook))
+    assert (shifted['Predicted Adult Height (cm)'].to_numpy() > default['Predicted Adult Height (cm)'].to_numpy()).all()
+    np.testing.assert_allclose(np.sort(shifted['Predicted Adult Height (cm)']),
+                               np.sort(expected['Predicted Adult Height (cm)']), atol=0.01)
@@ -0,0 +1,35 @@
+# ResultCache returns what calculate_metrics_batch does, from any mix of hits and misses
+import pandas as pd
+import pytest
+from helpers import athletes
+
+from matcal.engine import RESULT_COLUMNS, calculate_metrics_batch
+from matcal.memo import ResultCache
+
+
+@pytest.mark.parametrize('interpolate_ba', [False, True])
+def test_cache_matches_batch(interpolate_ba):
+    df = athletes(600)
+    cache = ResultCache(max_entries=800)
+    # repeated rows, a partly warm cache, edited rows, then an eviction
+    uploads = [pd.concat([df[:100], df[50:150]]), df[:400], df[:400].assign(body_mass_kg=df['body_mass_kg'] + 1), df]
+    for upload in uploads:
+        pd.testing.assert_frame_equal(cache.score(upload, interpolate_ba), calculate_metrics_batch(upload, interpolate_ba))
+    assert len(cache) == 800
+    assert cache.hits == 0 + 150 + 0 + 400
+
+
+def test_empty_frame_on_a_fresh_cache():
+    results = ResultCache().score(athletes(0))
+    assert list(results.columns) == RESULT_COLUMNS
+    assert len(results) == 0
+
+
+def test_persisted_cache_round_trip(tmp_path):
+    df = athletes(200)
+    cache = ResultCache(persist=True, cache_dir=str(tmp_path))
+    cache.score(df)
+    cache.save()
+    loaded = ResultCache(persist=True, cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(loaded.score(df), calculate_metrics_batch(df))
+    assert loaded.hits == 200
@@ -0,0 +1,26 @@
+# reference tables and their .npz cache
+import numpy as np
+from openpyxl import load_workbook
+
+from matcal.reference import WORKBOOK, Reference, load_reference_tables
+
+
+def test_unwritable_cache_dir_keeps_tables_in_memory(tmp_path):
+    # a cache directory that cannot be created, as in a read-only install
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    tables = load_reference_tables(WORKBOOK, str(blocker / 'cache'))
+    assert Reference(tables).age_range() == (9.0, 17.5)
+
+
+def test_female_coefficient_gap_is_not_a_valid_age(tmp_path):
+    book = load_workbook(WORKBOOK)
+    sheet = book['Metric coefficients']
+    header = [c.value for c in sheet[1]]
+    row = next(r for r in sheet.iter_rows(min_row=2) if r[0].value == 12)
+    row[header.index('Height')].value = None
+    path = str(tmp_path / 'gap.xlsx')
+    book.save(path)
+    ref = Reference(load_reference_tables(path, str(tmp_path)))
+    assert not ref.has_age(12.0)
+    assert ref.has_age(np.array([11.5, 12.5])).all()
@@ -0,0 +1,38 @@
+# HTTP request handling, driven through serve_connection without a socket
+import asyncio
+
+import pytest
+
+from matcal.service import ScoringService
+
+
+class Writer:
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def exchange(request):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(request)
+        reader.feed_eof()
+        writer = Writer()
+        await ScoringService().serve_connection(reader, writer)
+        return writer.data
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('length', [b'abc', b'-5'])
+def test_bad_content_length_is_a_400(length):
+    response = exchange(b'POST /score HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n{}')
+    assert response.startswith(b'HTTP/1.1 400 ')
+    assert b'Content-Length must' in response
@@ -0,0 +1,49 @@
+# ResultsStore round trips
+import numpy as np
+import pandas as pd
+from helpers import athletes
+
+from matcal.engine import calculate_metrics_batch
+from matcal.store import ResultsStore
+from matcal.validate import validate_inputs
+
+
+def append(store, df):
+    clean, _ = validate_inputs(df)
+    return store.append(calculate_metrics_batch(clean), clean)
+
+
+def test_numeric_and_text_names_share_a_year(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    df = athletes(40)
+    # all measured on one day, so both batches land in the same year's partition
+    df['dob'] += pd.Timestamp('2025-06-01') - df['measurement_date']
+    df['measurement_date'] = pd.Timestamp('2025-06-01')
+    append(store, df[:20].assign(athlete_name=range(20)))
+    append(store, df[20:])
+    out = store.query()
+    assert len(out) == 40
+    assert set(out['Athlete']) == {str(i) for i in range(20)} | {f'Athlete {i}' for i in range(20, 40)}
+    assert list(store.query(athlete=[3, 'Athlete 34'])['Athlete']) == ['3', 'Athlete 34']
+    store.compact()
+    assert len(store.query()) == 40
+
+
+def test_same_name_athletes_are_kept_apart(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    df = athletes(60)
+    # two squads' worth of shared names plus some blank ones, all on the same measurement dates
+    df['athlete_name'] = ['Sam Smith', 'Alex Lee', None] * 20
+    df['measurement_date'] = df['measurement_date'].iloc[0]
+    df['dob'] = df['measurement_date'] - pd.to_timedelta(np.arange(60) % 16 * 182 + 9 * 365, 'D')
+    assert append(store, df) == 60
+    assert len(store.query()) == 60
+    # re-scoring a third of them supersedes exactly those rows, without touching their namesakes
+    append(store, df[:20])
+    assert len(store.query()) == 60
+    assert len(store.query(latest_only=False)) == 80
+    latest = store.query(columns=['Athlete', 'Height (cm)', 'Scored At'])
+    assert latest['Scored At'].nunique() == 2
+    assert (latest['Scored At'] == latest['Scored At'].max()).sum() == 20
+    store.compact()
+    assert len(store.query(latest_only=False)) == 60
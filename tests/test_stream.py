@@ -0,0 +1,32 @@
+# streamed scoring keeps a valid output file whatever the chunks hold
+import pandas as pd
+import pytest
+from helpers import athletes
+
+from matcal.engine import RESULT_COLUMNS, calculate_metrics_batch
+from matcal.stream import score_stream
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'csv', 'xlsx'])
+def test_first_chunk_all_invalid(tmp_path, fmt):
+    df = athletes(30)
+    # the whole first chunk is invalid, and its athlete names are blank
+    df.loc[:9, 'sex'] = 'unknown'
+    df.loc[:9, 'athlete_name'] = None
+    source, dest = str(tmp_path / 'in.csv'), str(tmp_path / f'out.{fmt}')
+    df.to_csv(source, index=False)
+    stats = score_stream(source, dest, chunksize=10)
+    assert stats['rows'] == 20
+    assert sorted(stats['errors']['row']) == list(range(10))
+    out = pd.read_parquet(dest) if fmt == 'parquet' else pd.read_csv(dest) if fmt == 'csv' else pd.read_excel(dest)
+    assert list(out.columns) == RESULT_COLUMNS
+    assert list(out['Athlete']) == list(calculate_metrics_batch(df[10:])['Athlete'])
+
+
+def test_no_valid_rows_gives_an_empty_parquet_file(tmp_path):
+    source, dest = str(tmp_path / 'in.csv'), str(tmp_path / 'out.parquet')
+    athletes(5).assign(sex='unknown').to_csv(source, index=False)
+    assert score_stream(source, dest, chunksize=2)['rows'] == 0
+    out = pd.read_parquet(dest)
+    assert list(out.columns) == RESULT_COLUMNS
+    assert len(out) == 0
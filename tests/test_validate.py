@@ -0,0 +1,42 @@
+# validate_inputs: one report line per problem, explicit date formats
+import pandas as pd
+import pytest
+from helpers import athletes
+
+from matcal.validate import ERROR_COLUMNS, validate_inputs
+
+
+@pytest.mark.parametrize('text', ['2010-04-03', '2010-04-03 00:00:00', '03/04/2010', '03-04-2010', '2010/04/03'])
+def test_date_formats(text):
+    df = athletes(1).assign(dob=text, measurement_date='2022-10-01')
+    clean, errors = validate_inputs(df)
+    assert len(errors) == 0
+    assert clean['dob'].iloc[0] == pd.Timestamp('2010-04-03')
+
+
+def test_error_rows():
+    df = athletes(8).astype({'dob': object, 'standing_height_cm': object})
+    df.loc[1, 'dob'] = '2010-13-45'
+    df.loc[2, 'dob'] = None
+    df.loc[3, 'standing_height_cm'] = 'tall'
+    df.loc[4, 'body_mass_kg'] = 400
+    df.loc[5, 'sex'] = 'x'
+    df.loc[6, 'measurement_date'] = df.loc[6, 'dob'] - pd.Timedelta(days=1)
+    df.loc[7, 'measurement_date'] = df.loc[7, 'dob'] + pd.Timedelta(days=40 * 365)
+    clean, errors = validate_inputs(df)
+    assert list(errors.columns) == ERROR_COLUMNS
+    assert list(clean.index) == [0]
+    assert list(zip(errors['row'], errors['column'], errors['error'])) == [
+        (1, 'dob', "unrecognised date (expected YYYY-MM-DD or DD/MM/YYYY)"),
+        (2, 'dob', "missing"),
+        (3, 'standing_height_cm', "not a number"),
+        (4, 'body_mass_kg', "outside 5-250"),
+        (5, 'sex', "expected Male or Female"),
+        (6, 'measurement_date', "before date of birth"),
+        (7, 'age', "age outside reference range 9-17.5 y"),
+    ]
+    assert errors['value'].iloc[0] == '2010-13-45'
+    # with drop_invalid=False every row comes back, with NaN/NaT where coercion failed
+    kept, _ = validate_inputs(df, drop_invalid=False)
+    assert len(kept) == 8
+    assert pd.isna(kept.loc[1, 'dob']) and pd.isna(kept.loc[3, 'standing_height_cm'])